@@ -25,8 +25,25 @@ import sqlite3
 import uuid
 import csv
 import webbrowser
+import itertools
 from datetime import datetime
 
+from domaster import schema
+from domaster import search
+from domaster import task_graph
+from domaster import html_report
+from domaster.db_pool import DbPool
+from domaster.task_pager import TaskPager
+from domaster.tk_virtual import VirtualTree
+from domaster.worker import Worker
+from domaster.scheduler import Scheduler
+from domaster.task_row import batches
+
+SEARCH_DELAY_MS = 250 # debounce the Search All box
+TASK_COLUMNS = "ID, project_name, date_created, task_description, task_priority, next_task, date_done"
+DEPENDENCY_ROWS = 2000 # most rows shown in the Dependency Order panel
+NEXT_ACTIONS = 25      # rows shown in the Next Actions panel
+
 
 class TodoApp:
     def __init__(self, root, database=None):
@@ -37,6 +54,12 @@ class TodoApp:
             self.database = os.path.join(zdir, FILE_ROOT)
         else:
             self.database = database
+        self.pool = DbPool(self.database)
+        self.shown = {}         # tree iid -> row tuple on display
+        self.search_job = None  # pending debounced load_data
+        self.scheduler = Scheduler() # main thread + self.pool.connect() only
+        self.graphs = task_graph.GraphCache() # worker thread only
+        self.next_tree = None   # the Next Actions panel, when open
 
         self.root.title(f"{APP_NAME} - {VERSION}")
         self.root.geometry("1100x800")
@@ -57,6 +80,8 @@ class TodoApp:
         view_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.menu_bar.add_cascade(label="View", menu=view_menu)
         view_menu.add_checkbutton(label="Hide Completed Tasks", variable=self.hide_completed, command=self.load_data)
+        view_menu.add_command(label="Dependency Order", command=self.show_dependencies)
+        view_menu.add_command(label="Next Actions", command=self.show_next_actions)
 
 
         # File Menu
@@ -104,16 +129,21 @@ class TodoApp:
         search_frame.pack(pady=5, fill="x", padx=10)
         tk.Label(search_frame, text="Search All:").pack(side="left")
         self.search_var = tk.StringVar()
-        self.search_var.trace("w", lambda *args: self.load_data())
+        self.search_var.trace("w", lambda *args: self.schedule_load())
         tk.Entry(search_frame, textvariable=self.search_var).pack(side="left", fill="x", expand=True, padx=5)
 
         # --- Data Table ---
         cols = ("ID", "Project", "Created", "Description", "Priority", "Next")
-        self.tree = ttk.Treeview(root, columns=cols, show="headings")
+        table_frame = tk.Frame(root)
+        table_frame.pack(pady=10, padx=10, fill="both", expand=True)
+        self.tree = ttk.Treeview(table_frame, columns=cols, show="headings")
         for col in cols: self.tree.heading(col, text=col)
         self.tree.tag_configure("done", background="#d3d3d3", foreground="#666666")
         self.tree.tag_configure("todo", foreground="blue")
-        self.tree.pack(pady=10, padx=10, fill="both", expand=True)
+        scroll = ttk.Scrollbar(table_frame, orient="vertical")
+        scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.view = VirtualTree(self.tree, scroll, self.sync_rows, row_height=32)
 
         # Bindings
         self.tree.bind("<Double-1>", lambda e: self.open_edit_window())
@@ -137,26 +167,25 @@ class TodoApp:
         self.context_menu.add_command(label="Mark Todo", command=self.mark_undone)
 
         self.context_menu.add_command(label="Delete", command=self.delete_task)
+
+        # --- Status Bar ---
+        status_frame = tk.Frame(root)
+        status_frame.pack(fill="x", padx=10, pady=(0, 10))
+        self.status = tk.Label(status_frame, text="Ready", anchor="w")
+        self.status.pack(side="left", fill="x", expand=True)
+        self.progress = ttk.Progressbar(status_frame, length=300, mode="determinate")
+        self.progress.pack(side="right")
+
+        # Database & file work runs here, off of the Tk main thread:
+        self.worker = Worker(self.pool)
+        self.worker.attach(self.root)
         
+        self.init_db()
         self.load_data()
 
     def init_db(self):
-        """Initializes the database with the required schema."""
-        with sqlite3.connect(self.database) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS todo (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    uuid TEXT UNIQUE,
-                    project_name TEXT,
-                    date_created TEXT,
-                    date_done TEXT,
-                    task_description TEXT,
-                    task_priority INTEGER,
-                    next_task TEXT
-                );
-            """)
-            conn.commit()
+        """Creates / upgrades the database to the current schema."""
+        schema.migrate(self.pool.connect())
 
     def show_about(self):
         messagebox.showinfo("About", f"{APP_NAME}\nVersion: {VERSION}\n\nBuilt with Tkinter & SQLite.")
@@ -167,52 +196,158 @@ class TodoApp:
             self.tree.selection_set(item)
             self.context_menu.tk_popup(event.x_root, event.y_root)
 
+    def show_dependencies(self):
+        """Pending tasks in Next Task order - blockers first."""
+        def work(job):
+            conn = self.pool.connect()
+            graph = self.graphs.get(conn)
+            order, stuck = graph.topo_order()
+            depth = graph.depths()
+            pending = {r[0]: r for r in conn.execute(
+                "SELECT ID, project_name, task_description, task_priority FROM todo"
+                " WHERE date_done IS NULL OR date_done = ''")}
+            rows = []
+            for tid in itertools.islice(order + stuck, DEPENDENCY_ROWS):
+                r = pending.get(tid)
+                if r:
+                    blocked = "cycle" if tid not in depth else depth[tid]
+                    rows.append((tid, r[1], r[2], r[3], blocked, len(graph.chain(tid))))
+            return rows, len(order) + len(stuck), graph.cycles(), graph.critical_path()
+        def done(result):
+            rows, total, cycles, path = result
+            win = tk.Toplevel(self.root); win.title("Dependency Order"); win.geometry("900x600")
+            cols = ("ID", "Project", "Description", "Priority", "Depth", "Blocks")
+            tree = ttk.Treeview(win, columns=cols, show="headings")
+            for col in cols: tree.heading(col, text=col)
+            tree.tag_configure("cycle", foreground="red")
+            scroll = ttk.Scrollbar(win, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scroll.set)
+            notes = [f"{len(rows)} of {total} pending tasks."]
+            if len(path) > 1:
+                notes.append("Critical path: #" + " -> #".join(map(str, path)))
+            for loop in cycles:
+                notes.append("Cycle: #" + " -> #".join(map(str, loop)))
+            tk.Label(win, text="\n".join(notes), anchor="w", justify="left").pack(side="bottom", fill="x", padx=10)
+            scroll.pack(side="right", fill="y")
+            tree.pack(fill="both", expand=True, padx=10, pady=10)
+            for row in rows:
+                tree.insert("", tk.END, values=row, tags=("cycle",) if row[4] == "cycle" else ())
+        self.run_job("Ordering", work, on_done=done)
+
+    def show_next_actions(self):
+        """The pending tasks nothing pending blocks - best first."""
+        if self.next_tree and self.next_tree.winfo_exists():
+            self.next_tree.winfo_toplevel().lift()
+            self.load_next_actions()
+            return
+        win = tk.Toplevel(self.root); win.title("Next Actions"); win.geometry("800x500")
+        cols = ("ID", "Project", "Description", "Priority", "Created")
+        self.next_tree = ttk.Treeview(win, columns=cols, show="headings")
+        for col in cols: self.next_tree.heading(col, text=col)
+        self.next_label = tk.Label(win, anchor="w")
+        self.next_label.pack(side="bottom", fill="x", padx=10)
+        self.next_tree.pack(fill="both", expand=True, padx=10, pady=10)
+        self.load_next_actions()
+
+    def load_next_actions(self):
+        """Refill the Next Actions panel, when open."""
+        if not (self.next_tree and self.next_tree.winfo_exists()):
+            return
+        conn = self.pool.connect()
+        ids = self.scheduler.next(conn, NEXT_ACTIONS)
+        rows = {}
+        if ids:
+            marks = ", ".join("?" * len(ids))
+            rows = {r[0]: r for r in conn.execute(
+                f"SELECT ID, project_name, task_description, task_priority, date_created FROM todo WHERE ID IN ({marks})", ids)}
+        self.next_tree.delete(*self.next_tree.get_children())
+        for tid in ids:
+            if tid in rows: self.next_tree.insert("", tk.END, values=tuple(rows[tid]))
+        self.next_label.config(text=f"{len(self.scheduler)} tasks are ready to work on.")
+
+    def run_job(self, title, fn, *args, on_done=None):
+        """Run fn(job, *args) on the worker, with a progress bar."""
+        def finished(result):
+            self.status.config(text="Ready"); self.progress["value"] = 0
+            if on_done: on_done(result)
+        def failed(ex):
+            self.status.config(text="Ready"); self.progress["value"] = 0
+            messagebox.showerror("Error", str(ex))
+        def moved(done, total):
+            self.progress["value"] = done * 100 / total if total else 100
+        self.status.config(text=f"{title}...")
+        return self.worker.submit(fn, *args, on_done=finished, on_error=failed, on_progress=moved)
+
     def import_csv(self):
         file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         if not file_path: return
-        try:
+        def work(job, file_path):
+            size = max(os.path.getsize(file_path), 1)
+            read = 0
             with open(file_path, mode="r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                with sqlite3.connect(self.database) as conn:
-                    sql = """INSERT OR REPLACE INTO todo 
+                def lines():
+                    nonlocal read
+                    for line in f:
+                        read += len(line)
+                        yield line
+                reader = csv.DictReader(lines())
+                with self.pool.connect() as conn:
+                    # An upsert - by uuid - keeps each task's ID (& skips the unchanged.)
+                    # A CSV file's '' may be a NULL, so both compare alike:
+                    sql = """INSERT INTO todo 
                              (uuid, project_name, date_created, date_done, task_description, task_priority, next_task) 
-                             VALUES (:uuid, :project_name, :date_created, :date_done, :task_description, :task_priority, :next_task)"""
-                    conn.executemany(sql, reader)
-            self.load_data()
+                             VALUES (:uuid, :project_name, :date_created, :date_done, :task_description, :task_priority, :next_task)
+                             ON CONFLICT(uuid) DO UPDATE SET
+                                project_name = excluded.project_name, date_created = excluded.date_created,
+                                date_done = excluded.date_done, task_description = excluded.task_description,
+                                task_priority = excluded.task_priority, next_task = excluded.next_task
+                             WHERE NULLIF(project_name, '') IS NOT excluded.project_name
+                                OR NULLIF(date_created, '') IS NOT excluded.date_created
+                                OR NULLIF(date_done, '') IS NOT excluded.date_done
+                                OR NULLIF(task_description, '') IS NOT excluded.task_description
+                                OR NULLIF(task_priority, '') IS NOT excluded.task_priority
+                                OR NULLIF(next_task, '') IS NOT excluded.next_task"""
+                    while True:
+                        chunk = list(itertools.islice(reader, 1000))
+                        if not chunk: break
+                        job.check()
+                        conn.executemany(sql, [{key: value or None for key, value in row.items()}
+                                               for row in chunk])
+                        job.progress(read, size)
+        def done(result):
+            self.view.refresh(); self.load_next_actions()
             messagebox.showinfo("Import", "Database synced from CSV.")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.run_job("Importing", work, file_path, on_done=done)
 
     def export_csv(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if not file_path: return
-        with sqlite3.connect(self.database) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT uuid, project_name, date_created, date_done, task_description, task_priority, next_task FROM todo")
-            rows = cursor.fetchall()
-        with open(file_path, mode="w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["uuid", "project_name", "date_created", "date_done", "task_description", "task_priority", "next_task"])
-            writer.writerows(rows)
+        def work(job, file_path):
+            conn = self.pool.connect()
+            total = conn.execute("SELECT COUNT(*) FROM todo").fetchone()[0]
+            cursor = conn.execute("SELECT uuid, project_name, date_created, date_done, task_description, task_priority, next_task FROM todo")
+            with open(file_path, mode="w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["uuid", "project_name", "date_created", "date_done", "task_description", "task_priority", "next_task"])
+                done = 0
+                for batch in batches(cursor):
+                    job.check()
+                    writer.writerows(batch.rows())
+                    done += len(batch)
+                    job.progress(done, total)
+        self.run_job("Exporting", work, file_path)
 
     def export_html(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".html", filetypes=[("HTML files", "*.html")])
         if not file_path: return
-        with sqlite3.connect(self.database) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT ID, project_name, date_created, date_done, task_description, task_priority, next_task FROM todo")
-            rows = cursor.fetchall()
+        def done(result):
+            if messagebox.askyesno("Success", "HTML Exported. Open it?"): webbrowser.open("file://" + os.path.realpath(file_path))
+        self.run_job("Exporting", self.write_html, file_path, on_done=done)
 
-        html_content = f"<html><head><title>{APP_NAME} Export</title><style>body{{font-family:sans-serif;margin:40px;}} table{{width:100%;border-collapse:collapse;}} th,td{{padding:12px;border:1px solid #ccc;text-align:left;}} th{{background:#eee;}} .done{{background:#f0f0f0;color:#777;text-decoration:line-through;}} .todo{{color:blue;}}</style></head><body>"
-        html_content += f"<h1>{APP_NAME} Report</h1><p>Exported: {datetime.now().strftime('%Y-%m-%d %H:%M')}</p><table><tr><th>ID</th><th>Project</th><th>Created</th><th>Description</th><th>Priority</th><th>Status</th></tr>"
-        for row in rows:
-            cls = "done" if row[3] else "todo"
-            status = "Completed" if row[3] else "Pending"
-            html_content += f"<tr class='{cls}'><td>{row[0]}</td><td>{row[1]}</td><td>{row[2]}</td><td>{row[4]}</td><td>{row[5]}</td><td>{status}</td></tr>"
-        html_content += "</table></body></html>"
-
-        with open(file_path, "w", encoding="utf-8") as f: f.write(html_content)
-        if messagebox.askyesno("Success", "HTML Exported. Open it?"): webbrowser.open("file://" + os.path.realpath(file_path))
+    def write_html(self, job, file_path):
+        """Worker side of export_html."""
+        report = html_report.TableReport(file_path, APP_NAME)
+        html_report.stream(self.pool.connect(), [report], job.progress, job.check)
 
 ##    def load_data_o(self):
 ##        if not os.path.exists(self.database):
@@ -230,45 +365,101 @@ class TodoApp:
 ##                self.tree.insert("", tk.END, values=r[:6], tags=(tag,))
 
 
+    def schedule_load(self):
+        """Reload once typing pauses, rather than on every keystroke."""
+        if self.search_job:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DELAY_MS, self.load_data)
+
+    def get_filter(self, conn)->tuple:
+        """The WHERE condition + params for the search & view settings."""
+        where = "1"
+        clause, params = search.match_ids(conn, self.search_var.get())
+        if clause:
+            where += " AND " + clause
+        if self.hide_completed.get():
+            where += " AND date_done IS NULL"
+        return where, params
+
     def load_data(self):
         """Refreshes tree with filtering and priority-based sorting."""
+        self.search_job = None
         if not os.path.exists(self.database):
             self.init_db()
 
-        for i in self.tree.get_children(): self.tree.delete(i)
-        sq = f"%{self.search_var.get().strip()}%"
-        
-        with sqlite3.connect(self.database) as conn:
-            cursor = conn.cursor()
-            query = """SELECT ID, project_name, date_created, task_description, task_priority, next_task, date_done FROM todo
-                       WHERE (project_name || ' ' || task_description) LIKE ?"""
-##            query = """SELECT ID, project_name, date_created, task_description, task_priority, next_task, date_done FROM todo 
-##                     WHERE (COALESCE(project_name, "") || " " || COALESCE(task_description, "") || " " || COALESCE(uuid, "")) LIKE ?"""
-
-            if self.hide_completed.get():
-                query += " AND date_done IS NULL"
-            
-            # SORTING: Uncompleted first, then by priority (descending 5 to 1)
-            query += " ORDER BY project_name DESC, task_priority DESC, ID DESC"
-            
-            cursor.execute(query, (sq,))
-            for r in cursor.fetchall():
-                tag = "done" if r[6] else "todo"
-                self.tree.insert("", tk.END, values=r[:6], tags=(tag,))
+        where, params = self.get_filter(self.pool.connect())
+        # SORTING: by project, then by priority (descending 5 to 1)
+        pager = TaskPager(self.pool.connect, TASK_COLUMNS, where, params,
+                          descending=True)
+        size = self.view.page_size()
+        # A newer search cancels - interrupts - an older one:
+        self.worker.submit(lambda job: (pager.total(), pager.first(size)),
+                           key="load",
+                           on_done=lambda result: self.view.set_pager(pager, *result),
+                           on_error=lambda ex: messagebox.showerror("Error", str(ex)))
+
+    def show_row(self, row, index=tk.END):
+        """Insert or update one row on display."""
+        iid = str(row[0])
+        tag = "done" if row[6] else "todo"
+        if iid in self.shown:
+            self.tree.item(iid, values=row[:6], tags=(tag,))
+        else:
+            self.tree.insert("", index, iid=iid, values=row[:6], tags=(tag,))
+        self.shown[iid] = row
+
+    def sync_rows(self, rows):
+        """Diff rows into the tree - touching only what changed."""
+        rows = list(rows) # Task rows are tuples already
+        wanted = {str(r[0]) for r in rows}
+        gone = [iid for iid in self.shown if iid not in wanted]
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self.shown[iid]
+        current = self.tree.get_children()
+        pos = 0; placed = set()
+        for index, row in enumerate(rows):
+            iid = str(row[0])
+            while pos < len(current) and current[pos] in placed:
+                pos += 1
+            if pos < len(current) and current[pos] == iid:
+                pos += 1
+            elif iid in self.shown:
+                self.tree.move(iid, "", index)
+            placed.add(iid)
+            if self.shown.get(iid) != row:
+                self.show_row(row, index)
+
+    def refresh_row(self, tid):
+        """Patch a single task's row after a change."""
+        iid = str(tid)
+        with self.pool.connect() as conn:
+            self.scheduler.on_update(conn, tid)
+            where, params = self.get_filter(conn)
+            row = conn.execute(f"SELECT {TASK_COLUMNS} FROM todo WHERE ({where}) AND ID = ?",
+                               params + (tid,)).fetchone()
+        self.load_next_actions()
+        old = self.shown.get(iid)
+        if row and old and (old[1], old[4]) == (row['project_name'], row['task_priority']):
+            self.show_row(row) # same place - just this row
+            return
+        self.view.refresh() # it moved, came or went: re-read the window
 
     def add_task(self):
         p, d, pr = self.ent_project.get(), self.ent_desc.get(), self.ent_priority.get()
         if not d: return
-        with sqlite3.connect(self.database) as conn:
-            conn.execute("INSERT INTO todo (uuid, project_name, date_created, task_description, task_priority) VALUES (?, ?, ?, ?, ?)",
-                         (str(uuid.uuid4()), p, datetime.now().strftime("%Y-%m-%d %H:%M"), d, pr))
-        self.ent_project.delete(0, tk.END); self.ent_desc.delete(0, tk.END); self.ent_priority.delete(0, tk.END); self.load_data()
+        with self.pool.connect() as conn:
+            self.scheduler.check(conn)
+            cursor = conn.execute("INSERT INTO todo (uuid, project_name, date_created, task_description, task_priority) VALUES (?, ?, ?, ?, ?)",
+                                  (str(uuid.uuid4()), p, datetime.now().strftime("%Y-%m-%d %H:%M"), d, pr))
+        self.ent_project.delete(0, tk.END); self.ent_desc.delete(0, tk.END); self.ent_priority.delete(0, tk.END); self.refresh_row(cursor.lastrowid)
 
     def open_edit_window(self):
         sel = self.tree.selection()
         if not sel: return
         tid = self.tree.item(sel)["values"][0]
-        with sqlite3.connect(self.database) as conn:
+        with self.pool.connect() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT project_name, task_description, task_priority, next_task FROM todo WHERE ID = ?", (tid,))
             data = cursor.fetchone()
@@ -284,36 +475,40 @@ class TodoApp:
         e_n = tk.Entry(win, width=50); e_n.insert(0, data[3] or ""); e_n.pack(pady=5)
 
         def save():
-            with sqlite3.connect(self.database) as conn:
+            with self.pool.connect() as conn:
+                self.scheduler.check(conn)
                 conn.execute("UPDATE todo SET project_name=?, task_description=?, task_priority=?, next_task=? WHERE ID=?",
                              (e_p.get(), t_d.get("1.0", tk.END).strip(), e_pr.get(), e_n.get(), tid))
-            self.load_data(); win.destroy()
+            self.refresh_row(tid); win.destroy()
         tk.Button(win, text="Save Changes", bg="#28a745", fg="white", command=save, width=20).pack(pady=20)
 
     def mark_done(self):
         sel = self.tree.selection()
         if not sel: return
         tid = self.tree.item(sel)["values"][0]
-        with sqlite3.connect(self.database) as conn:
+        with self.pool.connect() as conn:
+            self.scheduler.check(conn)
             conn.execute("UPDATE todo SET date_done = ? WHERE ID = ?", (datetime.now().strftime("%Y-%m-%d %H:%M"), tid))
-        self.load_data()
+        self.refresh_row(tid)
 
     def mark_undone(self):
         sel = self.tree.selection()
         if not sel: return
         tid = self.tree.item(sel)["values"][0]
-        with sqlite3.connect(self.database) as conn:
-            conn.execute(f"UPDATE todo SET date_done = NULL WHERE ID = {tid};")
-        self.load_data()
+        with self.pool.connect() as conn:
+            self.scheduler.check(conn)
+            conn.execute("UPDATE todo SET date_done = NULL WHERE ID = ?;", (tid,))
+        self.refresh_row(tid)
 
     def delete_task(self):
         sel = self.tree.selection()
         if not sel: return
         tid = self.tree.item(sel)["values"][0]
         if messagebox.askyesno("Confirm", "Delete permanently?"):
-            with sqlite3.connect(self.database) as conn:
+            with self.pool.connect() as conn:
+                self.scheduler.check(conn)
                 conn.execute("DELETE FROM todo WHERE ID = ?", (tid,))
-            self.load_data()
+            self.refresh_row(tid)
 
 if __name__ == "__main__":
     root = tk.Tk()
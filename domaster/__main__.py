@@ -6,6 +6,13 @@
 # FILE: __main__.py
 # AUTHOR: Randall Nagy
 #
-from . main import mainloop
+import sys
 
-mainloop()
+# Guarded: report worker processes re-import this module.
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        # Headless: python -m domaster <command> ...
+        from . cli import main
+        sys.exit(main())
+    from . main import mainloop
+    mainloop()
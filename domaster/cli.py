@@ -0,0 +1,251 @@
+# MISSION: Script DoMaster from cron jobs & shell pipelines.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: python -m domaster <command> ... No UI driver, no tkinter.
+# Results go to stdout as JSON or CSV; messages go to stderr.
+# DATE: 2026-10-18 16:05:33
+# FILE: cli.py
+# AUTHOR: Randall Nagy
+#
+import os, sys
+import argparse
+import csv
+import json
+import uuid
+import sqlite3
+import datetime
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster import schema
+from domaster import search
+from domaster.task_row import task_factory, batches
+
+FILE_ROOT = "domaster.db" # as main.py
+COLUMNS = "t.ID, t.uuid, t.project_name, t.date_created, t.date_done, t.task_description, t.task_priority, t.next_task"
+FETCH_ROWS = 1000
+
+def default_db(local=False)->str:
+    ''' The GLOBAL (module) database, else the PWD / LOCAL one. '''
+    if local:
+        return os.path.join(os.getcwd(), FILE_ROOT)
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), FILE_ROOT)
+
+def open_db(db_file)->sqlite3.Connection:
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = task_factory
+    schema.migrate(conn)
+    return conn
+
+def get_now()->str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def emit(cursor, fmt, out=None, rows=None)->int:
+    ''' Stream a cursor's rows - else rows - as JSON (an array) or CSV. '''
+    out = out or sys.stdout
+    if rows is None:
+        names = [d[0] for d in cursor.description]
+        chunks = (batch.rows() for batch in batches(cursor, FETCH_ROWS))
+    else:
+        names = list(rows[0].keys()) if rows else []
+        chunks = [rows]
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(names)
+    else:
+        out.write('[')
+    for chunk in chunks:
+        for row in chunk:
+            if fmt == 'csv':
+                writer.writerow(row)
+            else:
+                out.write(',\n' if count else '\n')
+                out.write(json.dumps(dict(zip(names, row))))
+            count += 1
+    if fmt != 'csv':
+        out.write('\n]\n' if count else ']\n')
+    return count
+
+def warn(*args):
+    print(*args, file=sys.stderr)
+
+def do_add(conn, args)->int:
+    next_t = 0
+    if args.next:
+        row = conn.execute("SELECT uuid FROM todo WHERE ID = ?", (args.next,)).fetchone()
+        if not row:
+            warn(f"Task #{args.next} not found.")
+            return 1
+        next_t = row[0]
+    task = {
+        'uuid': str(uuid.uuid4()),
+        'project_name': args.project,
+        'date_created': get_now(),
+        'task_description': ' '.join(args.description),
+        'task_priority': args.priority,
+        'next_task': next_t
+        }
+    cursor = conn.execute("""INSERT INTO todo (uuid, project_name, date_created, task_description, task_priority, next_task)
+                 VALUES (:uuid, :project_name, :date_created, :task_description, :task_priority, :next_task)""", task)
+    conn.commit()
+    task['ID'] = cursor.lastrowid
+    print(json.dumps(task))
+    return 0
+
+def do_done(conn, args)->int:
+    now = get_now(); missing = []
+    for tid in args.ids:
+        if not conn.execute("UPDATE todo SET date_done = ? WHERE ID = ?", (now, tid)).rowcount:
+            missing.append(tid)
+    conn.commit()
+    for tid in missing:
+        warn(f"Task #{tid} not found.")
+    return 1 if missing else 0
+
+def do_list(conn, args)->int:
+    sql = (f"SELECT {COLUMNS}, n.ID AS next_id FROM todo t"
+           " LEFT JOIN todo n ON n.uuid = t.next_task WHERE 1")
+    params = []
+    if args.status == 'pending':
+        sql += " AND (t.date_done IS NULL OR t.date_done = '')"
+    elif args.status == 'done':
+        sql += " AND t.date_done IS NOT NULL AND t.date_done != ''"
+    if args.project is not None:
+        sql += " AND t.project_name = ?"
+        params.append(args.project)
+    sql += " ORDER BY t.project_name ASC, t.task_priority ASC, t.date_created"
+    if args.limit:
+        sql += " LIMIT ?"
+        params.append(args.limit)
+    emit(conn.execute(sql, params), args.format)
+    return 0
+
+def do_search(conn, args)->int:
+    # As do_list - + the snippet, when asked:
+    rows = search.find(conn, ' '.join(args.words), '', args.limit,
+                       columns=COLUMNS, snippet=args.snippet)
+    emit(None, args.format, rows=rows)
+    return 0
+
+def do_export(conn, args)->int:
+    if args.changes:
+        if not args.output or args.format != 'csv':
+            warn("Error: --changes needs a CSV --output file.")
+            return 1
+        from domaster.sync_tool import SQLiteCSVSync
+        conn.commit()
+        count = SQLiteCSVSync(args.db, 'todo', None).export_changes(args.output, args.changes)
+        warn(f"Exported {count} changes to {args.output}.")
+        return 0
+    names = [info[1] for info in conn.execute("PRAGMA table_info(todo)")
+             if info[1] not in schema.LOCAL_COLUMNS]
+    cursor = conn.execute(f"SELECT {', '.join(names)} FROM todo ORDER BY ID")
+    if not args.output:
+        emit(cursor, args.format)
+        return 0
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        count = emit(cursor, args.format, f)
+    warn(f"Exported {count} rows to {args.output}.")
+    return 0
+
+def do_import(conn, args)->int:
+    from domaster.sync_tool import SQLiteCSVSync
+    sync = SQLiteCSVSync(args.db, 'todo', None)
+    count = sync.import_from_csv(args.file, confirm=False, report=warn)
+    print(json.dumps({'imported': count}))
+    return 0
+
+def do_sync(conn, args)->int:
+    from domaster.replica_sync import sync
+    conn.commit()
+    print(json.dumps(sync(args.db, args.folder)))
+    return 0
+
+def do_backup(conn, args)->int:
+    from domaster.backup_store import BackupStore
+    folder = args.store
+    if not folder:
+        from domaster.keeper import Keeps
+        folder = Keeps.get_option('backup')
+        if not folder:
+            warn("Error: Please select a backup location (--store.)")
+            return 1
+        folder = os.sep.join((folder, 'domaster_store')) # as ManageArchived
+    manifest = BackupStore(folder).create(args.db)
+    if not manifest:
+        warn("Error: Backup failed.")
+        return 1
+    del manifest['chunks']
+    print(json.dumps(manifest))
+    return 0
+
+def get_parser()->argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m domaster',
+        description="DoMaster without a user interface. Run without a command for the menus.")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument('--db', help="database file (default: the GLOBAL database)")
+    where.add_argument('--local', action='store_true', help=f"use ./{FILE_ROOT}")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    cmd = commands.add_parser('add', help="add a task")
+    cmd.add_argument('description', nargs='+')
+    cmd.add_argument('-p', '--project', default='')
+    cmd.add_argument('-r', '--priority', type=int, default=0)
+    cmd.add_argument('-n', '--next', type=int, default=0, help="ID of the next task")
+    cmd.set_defaults(run=do_add)
+
+    cmd = commands.add_parser('done', help="mark task ID(s) completed")
+    cmd.add_argument('ids', nargs='+', type=int)
+    cmd.set_defaults(run=do_done)
+
+    for name, run, text in (('list', do_list, "list tasks"),
+                            ('search', do_search, "full-text search")):
+        cmd = commands.add_parser(name, help=text)
+        cmd.add_argument('-f', '--format', choices=('json', 'csv'), default='json')
+        cmd.add_argument('-l', '--limit', type=int, default=None)
+        cmd.set_defaults(run=run)
+        if name == 'list':
+            cmd.add_argument('-s', '--status', choices=('pending', 'done', 'all'), default='pending')
+            cmd.add_argument('-p', '--project', default=None)
+        else:
+            cmd.add_argument('words', nargs='+')
+            cmd.add_argument('--snippet', action='store_true',
+                             help="add each match's marked-up text")
+
+    cmd = commands.add_parser('export', help="every task - import ready")
+    cmd.add_argument('-f', '--format', choices=('csv', 'json'), default='csv')
+    cmd.add_argument('-o', '--output', help="file (default: stdout)")
+    cmd.add_argument('-c', '--changes', nargs='?', const='default', metavar='NAME',
+                     help="only what changed since the last --changes export to NAME")
+    cmd.set_defaults(run=do_export)
+
+    cmd = commands.add_parser('import', help="upsert tasks from a CSV file, by uuid")
+    cmd.add_argument('file')
+    cmd.set_defaults(run=do_import)
+
+    cmd = commands.add_parser('sync', help="two-way sync through a shared folder")
+    cmd.add_argument('folder')
+    cmd.set_defaults(run=do_sync)
+
+    cmd = commands.add_parser('backup', help="add a point in time to the backup store")
+    cmd.add_argument('--store', help="store folder (default: the archive option)")
+    cmd.set_defaults(run=do_backup)
+    return parser
+
+def main(argv=None)->int:
+    args = get_parser().parse_args(argv)
+    if not args.db:
+        args.db = default_db(args.local)
+    conn = open_db(args.db)
+    try:
+        return args.run(conn, args)
+    except (OSError, ValueError, sqlite3.Error) as ex:
+        warn(f"Error: {ex}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,322 @@
+# MISSION: A full-screen text UI for very large to-do lists.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: Optional - see API.set_curses(). Menu, output & input each
+# have a window; curses only repaints the cells that change. Task
+# lists page from the database a screen at a time (TaskPager.)
+# DATE: 2026-10-18 19:36:02
+# FILE: curses_loop.py
+# AUTHOR: Randall Nagy
+#
+import sys
+import time
+import atexit
+import locale
+import curses
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster.ui_loop import API
+from domaster.tui_loop import TuiLoop
+
+REFRESH_SECS = 0.05 # most often print() repaints
+MENU_WIDE = 26      # columns per menu entry
+KEY_BACK = ('q', 'Q', '\x1b', curses.KEY_LEFT)
+KEY_ENTERS = ('\n', '\r', curses.KEY_ENTER)
+KEY_ERASE = ('\b', '\x7f', curses.KEY_BACKSPACE)
+
+class CursesLoop(TuiLoop):
+    '''
+The TuiLoop menus, full screen. The menu is drawn once per menu,
+not once per selection; output scrolls in a window of its own.
+page_rows() browses a TaskPager: PgUp / PgDn, Home / End, the
+arrow keys, '#' to jump to a task ID, Enter for every field and
+'q' to return.
+'''
+    def __init__(self):
+        super().__init__()
+        locale.setlocale(locale.LC_ALL, '')
+        self.screen = curses.initscr()
+        try:
+            curses.noecho()
+            curses.cbreak()
+            self.attrs = self._colors()
+            self.shown = None # what the menu window holds
+            self.painted = 0.0
+            self.layout()
+        except:
+            self.close()
+            raise
+        atexit.register(self.close)
+
+    @staticmethod
+    def _colors()->dict:
+        ''' Color code -> attribute, as GuiApp's text tags. '''
+        attrs = {API.CNONE: curses.A_NORMAL, API.CALT: curses.A_BOLD,
+                 API.CUSER: curses.A_UNDERLINE, API.CERR: curses.A_STANDOUT}
+        if curses.has_colors():
+            curses.start_color()
+            try:
+                curses.use_default_colors()
+                back = -1
+            except curses.error:
+                back = curses.COLOR_BLACK
+            for pair, (code, fore) in enumerate(((API.CNONE, curses.COLOR_YELLOW),
+                                                 (API.CALT, curses.COLOR_WHITE),
+                                                 (API.CUSER, curses.COLOR_CYAN),
+                                                 (API.CERR, curses.COLOR_RED)), 1):
+                curses.init_pair(pair, fore, back)
+                attrs[code] = curses.color_pair(pair) | (curses.A_BOLD if code == API.CALT else 0)
+        return attrs
+
+    def close(self):
+        ''' Give the terminal back. '''
+        if self.screen:
+            curses.nocbreak()
+            curses.echo()
+            curses.endwin()
+            self.screen = None
+
+    def layout(self):
+        ''' (Re)build the windows for the screen size + menu. '''
+        rows, wide = self.screen.getmaxyx()
+        high = self.menu_rows()
+        self.menu_win = curses.newwin(max(high, 1), wide, 0, 0)
+        self.out = curses.newwin(max(rows - high - 1, 1), wide, high, 0)
+        self.out.scrollok(True)
+        self.out.keypad(True)
+        self.line = curses.newwin(1, wide, rows - 1, 0)
+        self.line.keypad(True)
+        self.shown = None
+        self.screen.erase()
+        self.screen.noutrefresh()
+        self.out.noutrefresh()
+
+    def menu_rows(self)->int:
+        ''' The menu window's height: the title + the options. '''
+        if not self.options:
+            return 0
+        rows, wide = self.screen.getmaxyx()
+        per_row = max(wide // MENU_WIDE, 1)
+        return min(-(-len(self.options) // per_row) + 1, rows // 2)
+
+    def paint(self, now=False):
+        ''' Push the changes to the terminal - at most every REFRESH_SECS. '''
+        tick = time.monotonic()
+        if now or tick - self.painted >= REFRESH_SECS:
+            self.out.noutrefresh()
+            curses.doupdate()
+            self.painted = tick
+
+    def draw_menu(self):
+        ''' Redraw the menu window - only when the menu has changed. '''
+        if self.shown == (self.title, tuple(self.options)):
+            return
+        if self.menu_win.getmaxyx()[0] != max(self.menu_rows(), 1):
+            self.layout()
+        self.shown = (self.title, tuple(self.options))
+        win = self.menu_win
+        high, wide = win.getmaxyx()
+        per_row = max(wide // MENU_WIDE, 1)
+        win.erase()
+        self.put(win, 0, 0, self.title, curses.A_REVERSE)
+        for ss, op in enumerate(self.options, 1):
+            row, col = divmod(ss - 1, per_row)
+            if row + 1 < high:
+                self.put(win, row + 1, col * MENU_WIDE, f'{ss:02}.) {op}', width=MENU_WIDE - 1)
+        win.noutrefresh()
+
+    @staticmethod
+    def put(win, row, col, text, attr=curses.A_NORMAL, width=None):
+        ''' addstr, clipped to the window - never raises. '''
+        wide = win.getmaxyx()[1] - col - 1
+        if width:
+            wide = min(wide, width)
+        try:
+            win.addstr(row, col, str(text)[:max(wide, 0)], attr)
+        except curses.error:
+            pass
+
+    def print(self, *args, **kwargs):
+        ''' Arguments are separated by sep, as TuiLoop.print(). '''
+        sep = kwargs.get('sep', '\n')
+        end = kwargs.get('end', '\n')
+        text = sep.join(str(arg) for arg in args) + end if args else end
+        if not text:
+            return
+        for code, seg in API.parse_coddes_str(text):
+            try:
+                self.out.addstr(seg, self.attrs.get(code, curses.A_NORMAL))
+            except curses.error:
+                pass # the bottom right corner
+        self.paint(kwargs.get('flush', False))
+
+    def input(self, *args, **kwargs):
+        ''' A one line editor - the entry is echoed to the output. '''
+        prompt = str(args[0]) if args else ''
+        text = ''
+        self.paint(True)
+        while True:
+            self.line.erase()
+            self.put(self.line, 0, 0, prompt + text, self.attrs[API.CUSER])
+            self.line.noutrefresh()
+            curses.doupdate()
+            try:
+                key = self.line.get_wch()
+            except curses.error:
+                continue
+            if key in KEY_ENTERS:
+                break
+            if key in KEY_ERASE:
+                text = text[:-1]
+            elif key == curses.KEY_RESIZE:
+                self.layout()
+                self.draw_menu()
+            elif isinstance(key, str) and key.isprintable():
+                text += key
+        self.line.erase()
+        self.line.noutrefresh()
+        self.print(f'{prompt}{API.CUSER}{text}')
+        return text
+
+    def menu_ops(self, ops, options, title)->bool:
+        top = not self.ops
+        try:
+            return super().menu_ops(ops, options, title)
+        finally:
+            if top:
+                self.close()
+
+    def show_menu(self):
+        ''' TuiLoop.show_menu() - less the reprinting. '''
+        keys = list(self.options.keys())
+        times=0;errors=0;selection=None;entry=None
+        while self.is_done() == False:
+            self.loop_status(times=times, errors=errors,
+                        selection=selection, entry=entry)
+            self.draw_menu()
+            try:
+                entry = selection = self.input("Enter #: ")
+                which = int(selection.strip())
+                times += 1; errors += 1
+                if which > 0 and which <= len(keys):
+                    times = 0
+                    selection = keys[which-1]
+                    if selection in self.options: # double check
+                        self.print('*'*which, selection, sep=' ')
+                        errors = 0           # RESET
+                        self.options[selection]()
+                else:
+                    self.print(f"Invalid number {which}.")
+            except ValueError:
+                self.print("Numbers only, please.")
+                continue
+            except Exception as ex:
+                self.print(ex)
+                continue
+        return True
+
+    # --- Paged task lists ---
+
+    @staticmethod
+    def summary(row)->str:
+        ''' One screen line per task. '''
+        done = '*' if row['date_done'] else ' '
+        proj = '' if row['project_name'] is None else row['project_name']
+        pri = '' if row['task_priority'] is None else row['task_priority']
+        return f"{row['ID']:>7} {done} {str(proj):<16.16} {str(pri):>4}  {row['task_description']}"
+
+    def show_fields(self, row):
+        ''' Every field of one task - until a key is pressed. '''
+        self.out.erase()
+        for ss, name in enumerate(row.keys()):
+            self.put(self.out, ss, 0, f"{name:>16}: {row[name]}")
+        self.put(self.out, self.out.getmaxyx()[0] - 1, 0, "Press any key.", curses.A_REVERSE)
+        self.paint(True)
+        self.out.get_wch()
+
+    def page_rows(self, pager, title)->bool:
+        ''' Browse a TaskPager, a screen at a time. '''
+        total = pager.total()
+        size = max(self.out.getmaxyx()[0] - 1, 1)
+        rows = pager.first(size); pos = 0; sel = 0
+        note = ''; dirty = True; old = sel
+        while True:
+            high, wide = self.out.getmaxyx()
+            if dirty:   # a new page: every line
+                self.out.erase()
+                for ss, row in enumerate(rows):
+                    self.put(self.out, ss, 0, self.summary(row),
+                             curses.A_REVERSE if ss == sel else curses.A_NORMAL)
+                first = pos + 1 if rows else 0
+                footer = (f"{title}: {first}-{pos + len(rows)} of {total}  "
+                          f"PgUp/PgDn Home/End #:jump Enter:view q:back  {note}")
+                self.put(self.out, high - 1, 0, footer, curses.A_REVERSE)
+                dirty = False
+            elif old != sel: # a new selection: two lines
+                for ss in old, sel:
+                    self.out.move(ss, 0)
+                    self.out.clrtoeol()
+                    self.put(self.out, ss, 0, self.summary(rows[ss]),
+                             curses.A_REVERSE if ss == sel else curses.A_NORMAL)
+            old = sel
+            self.paint(True)
+            try:
+                key = self.out.get_wch()
+            except curses.error:
+                continue
+            note = ''; page = None
+            if key in KEY_BACK:
+                break
+            elif key == curses.KEY_DOWN and rows:
+                if sel + 1 < len(rows):
+                    sel += 1
+                    continue
+                page = pager.after(pager.key(rows[-1]), size)
+                if page:
+                    pos += len(rows); sel = 0
+            elif key == curses.KEY_UP and rows:
+                if sel:
+                    sel -= 1
+                    continue
+                page = pager.before(pager.key(rows[0]), size)
+                if page:
+                    pos -= len(page); sel = len(page) - 1
+            elif key in (curses.KEY_NPAGE, ' ') and rows:
+                page = pager.after(pager.key(rows[-1]), size)
+                if page:
+                    pos += len(rows); sel = 0
+            elif key == curses.KEY_PPAGE and rows:
+                page = pager.before(pager.key(rows[0]), size)
+                if page:
+                    pos -= len(page); sel = 0
+            elif key in (curses.KEY_HOME, 'g'):
+                page = pager.first(size); pos = 0; sel = 0
+            elif key in (curses.KEY_END, 'G'):
+                page = pager.last(size); pos = max(total - len(page), 0); sel = 0
+            elif key == '#':
+                try:
+                    tid = int(self.input("Jump to task ID: "))
+                except ValueError:
+                    tid = 0
+                found = pager.find_id(tid) if tid else None
+                if found:
+                    page = pager.after(found, size, inclusive=True)
+                    pos = pager.position(found); sel = 0
+                else:
+                    note = f"Task #{tid} is not in this view."
+            elif key in KEY_ENTERS and rows:
+                self.show_fields(rows[sel])
+            elif key == curses.KEY_RESIZE:
+                self.layout()
+                self.draw_menu()
+                size = max(self.out.getmaxyx()[0] - 1, 1)
+                if rows:
+                    page = pager.after(pager.key(rows[0]), size, inclusive=True)
+                sel = 0
+            if page:
+                rows = page
+            dirty = True
+        self.out.erase()
+        self.paint(True)
+        return True
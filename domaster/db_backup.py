@@ -0,0 +1,89 @@
+# MISSION: Online (hot) database backup & restore.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: sqlite3 backup API - safe while others keep writing.
+# DATE: 2026-10-18 10:48:26
+# FILE: db_backup.py
+# AUTHOR: Randall Nagy
+#
+import os
+import sqlite3
+
+DEFAULT_PAGES = 256 # pages copied per step (-1 = all at once)
+STEP_SLEEP    = 0.005 # seconds to yield to writers between steps
+
+def quick_check(db_file)->bool:
+    ''' True when PRAGMA quick_check passes. '''
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+def copy_db(source, target, pages=DEFAULT_PAGES, progress=None)->bool:
+    ''' Page-stepped copy of a live database into target.
+        progress(status, remaining, total) follows each step.
+    '''
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst, pages=int(pages) or -1,
+                   progress=progress, sleep=STEP_SLEEP)
+        return dst.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+    except sqlite3.Error:
+        return False
+    finally:
+        dst.close()
+        src.close()
+
+def backup(source, archive, pages=DEFAULT_PAGES, progress=None)->bool:
+    ''' Hot-copy source to archive. The old archive is only
+        replaced once the new copy has been checked.
+    '''
+    if not os.path.exists(source):
+        return False
+    temp = archive + '.tmp'
+    if os.path.exists(temp):
+        os.unlink(temp)
+    if not copy_db(source, temp, pages, progress):
+        if os.path.exists(temp):
+            os.unlink(temp)
+        return False
+    os.replace(temp, archive)
+    return True
+
+def restore(archive, target, pages=DEFAULT_PAGES, progress=None)->bool:
+    ''' Copy a checked archive back over a (possibly open) database. '''
+    if not os.path.exists(archive) or not quick_check(archive):
+        return False
+    return copy_db(archive, target, pages, progress)
+
+
+if __name__ == '__main__':
+    import sys, tempfile
+    zdir = tempfile.mkdtemp()
+    live = os.path.join(zdir, 'live.db')
+    arch = os.path.join(zdir, 'arch.db')
+    conn = sqlite3.connect(live)
+    conn.execute("CREATE TABLE t (v)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(ss,) for ss in range(5000)])
+    conn.commit()
+    steps = []
+    if not backup(live, arch, 4, lambda *args: steps.append(args)):
+        print("Error 010: backup failure.")
+        sys.exit(10)
+    if len(steps) < 2:
+        print("Error 020: progress failure.")
+        sys.exit(20)
+    conn.execute("DELETE FROM t")
+    conn.commit()
+    if not restore(arch, live):
+        print("Error 030: restore failure.")
+        sys.exit(30)
+    if conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] != 5000:
+        print("Error 040: restore content failure.")
+        sys.exit(40)
+    conn.close()
+    print("Testing Success!")
@@ -0,0 +1,128 @@
+# MISSION: Share long-lived SQLite connections across DoMaster.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: One connection per thread, per database file.
+# DATE: 2026-10-18 09:12:04
+# FILE: db_pool.py
+# AUTHOR: Randall Nagy
+#
+import sys
+import pathlib
+import threading
+import sqlite3
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster.task_row import task_factory
+
+def data_stamp(conn)->tuple:
+    ''' Changes whenever the database does. PRAGMA data_version
+        only sees commits from other connections, so count our
+        own changes, too.
+    '''
+    return (conn.execute("PRAGMA data_version").fetchone()[0],
+            conn.total_changes)
+
+def read_only(db_file)->str:
+    ''' A read-only URI for the file - with its name escaped
+        ('#', '?', '%' ...) Open with uri=True, or ATTACH it.
+    '''
+    return pathlib.Path(db_file).resolve().as_uri() + '?mode=ro'
+
+class DbPool:
+    '''
+Keep one open connection per thread for the active
+database file. Connections are reused until the file
+is changed via use(), or until close() is called.
+'''
+    def __init__(self, db_file=None):
+        self.db_file = db_file
+        self.opened  = 0
+        self.reused  = 0
+        self._local  = threading.local()
+        self._lock   = threading.Lock()
+        self._conns  = {} # thread ident -> connection
+
+    def use(self, db_file)->bool:
+        ''' Switch database files. True if the file changed. '''
+        if db_file == self.db_file:
+            return False
+        self.close()
+        self.db_file = db_file
+        return True
+
+    def connect(self)->sqlite3.Connection:
+        ''' The connection for this thread - opened on demand. '''
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.db_file == self.db_file:
+            with self._lock:
+                self.reused += 1
+            return conn
+        if conn is not None:
+            self._drop(conn)
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.row_factory = task_factory
+        self._local.conn = conn
+        self._local.db_file = self.db_file
+        with self._lock:
+            self.opened += 1
+            self._conns[threading.get_ident()] = conn
+        return conn
+
+    def _drop(self, conn):
+        with self._lock:
+            for key, value in list(self._conns.items()):
+                if value is conn:
+                    del self._conns[key]
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self)->None:
+        ''' Close every pooled connection (all threads.) '''
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def interrupt(self, ident)->bool:
+        ''' Abort whatever thread ident's connection is running. '''
+        with self._lock:
+            conn = self._conns.get(ident)
+        if conn is None:
+            return False
+        conn.interrupt()
+        return True
+
+    def stats(self)->dict:
+        ''' Connections opened versus reused. '''
+        with self._lock:
+            return {
+                'opened': self.opened,
+                'reused': self.reused,
+                'open_now': len(self._conns)
+                }
+
+
+if __name__ == '__main__':
+    import os, sys, tempfile
+    zdir = tempfile.mkdtemp()
+    pool = DbPool(os.path.join(zdir, 'a.db'))
+    for ss in range(10):
+        pool.connect().execute("SELECT 1")
+    if pool.stats() != {'opened': 1, 'reused': 9, 'open_now': 1}:
+        print("Error 010: Pool reuse failure.")
+        sys.exit(10)
+    pool.use(os.path.join(zdir, 'b.db'))
+    pool.connect()
+    if pool.stats()['opened'] != 2:
+        print("Error 020: Pool swap failure.")
+        sys.exit(20)
+    pool.close()
+    print("Testing Success!")
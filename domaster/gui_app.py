@@ -7,11 +7,16 @@
 # AUTHOR: Randall Nagy
 #
 import sys
+import queue
+import threading
 import tkinter as tk
 
 if '..' not in sys.path:
     sys.path.insert(0, '..')
 from domaster.ui_loop import API
+from domaster.worker import Worker
+
+SCROLLBACK = 5000 # lines kept in the display (Keeps option 'scrollback')
 
 class GuiApp(tk.Tk):
     """
@@ -33,6 +38,18 @@ class GuiApp(tk.Tk):
         self.uerrors   = 0
         self.uselection= None
         self.uentry    = None
+
+        # menu callbacks run on the worker thread:
+        self.worker    = Worker(getattr(ops, 'pool', None))
+        self.answers   = queue.Queue()
+        self.awaiting  = False # worker waits on an answer
+        self.busy      = False # a menu callback is running
+
+        # output: buffered, then written once per event-loop tick:
+        self.out_lock   = threading.Lock()
+        self.out_chunks = [] # (text, tag) ...
+        self.out_queued = False
+        self.scrollback = self._get_scrollback()
         
         # tkwindow configuration:
         self.title(self.menu_title)
@@ -48,8 +65,17 @@ class GuiApp(tk.Tk):
         self.button_pressed = tk.IntVar(value=0)
         self._setup_widgets()
         self._bind_events()
+        self.worker.attach(self)
         self.submit_btn.after(1000, self.show_menu())
 
+    @staticmethod
+    def _get_scrollback()->int:
+        from domaster.keeper import Keeps
+        try:
+            return max(int(Keeps.get_option('scrollback', default_value=SCROLLBACK)), 100)
+        except (TypeError, ValueError):
+            return SCROLLBACK
+
     def _maximize_window(self):
         """Cross-platform method to fill the screen."""
         if sys.platform.startswith('win'):
@@ -140,18 +166,32 @@ class GuiApp(tk.Tk):
         dlg.destroy()
         return result
 
+    def ask_worker(self, prompt):
+        ''' Prompt on behalf of the worker thread + wait for Submit. '''
+        self.awaiting = True
+        self.print(prompt, sep='', tag='hi_text')
+        return self.answers.get()
+
     def get_int(self, prompt, default=0)->int:
         ''' Prompt to return an integral input, else the default value. '''
+        if self.worker.on_worker():
+            try:
+                return int(self.ask_worker(prompt))
+            except (TypeError, ValueError):
+                return default
         self.print(prompt, sep='', tag='hi_text')
         self.button_pressed.set(9000)
         self.submit_btn.wait_variable(self.button_pressed)
         self.button_pressed.set(0)
-        if not self.content:
+        try:
+            return int(self.content)
+        except (TypeError, ValueError):
             return default
-        return self.content
 
     def get_input(self, prompt, default='')->str:
         ''' Prompt to return an integral input, else the default value. '''
+        if self.worker.on_worker():
+            return self.ask_worker(prompt) or default
         self.print(prompt, sep='', tag='hi_text')
         self.button_pressed.set(9000)
         self.submit_btn.wait_variable(self.button_pressed)
@@ -165,9 +205,16 @@ class GuiApp(tk.Tk):
         self.content = self.entry.get()
         self.print(self.content, tag='user_text')
         self.entry.delete(0, tk.END)
+        if self.awaiting:
+            self.awaiting = False
+            self.answers.put(self.content)
+            return
         if self.button_pressed.get() == 9000:
             self.button_pressed.set(1)
             return
+        if self.busy:
+            self.print("Busy - please wait.", tag='error_text')
+            return
         try:
             which = int(self.content.strip())
             self.utimes += 1; self.uerrors += 1
@@ -177,23 +224,38 @@ class GuiApp(tk.Tk):
                 selection = keys[which-1]
                 if selection in self.options: # double check
                     self.uerrors = 0          # RESET
-                    self.options[selection]()
-                self.show_menu()
+                    self.run_option(self.options[selection])
+                else:
+                    self.show_menu()
             else:
                 self.print(f"Invalid number {which}.")
         except ValueError:
             self.print("Numbers only, please.")
 
+    def run_option(self, option):
+        ''' Run a menu callback on the worker - then redraw the menu. '''
+        def done(result):
+            self.busy = False
+            self.show_menu()
+        def failed(ex):
+            self.busy = False
+            self.print(ex, tag='error_text')
+            self.show_menu()
+        self.busy = True
+        self.worker.submit(lambda job: option(), on_done=done, on_error=failed)
+
     def do_quit(self):
         self.pop_ops()
 
     def print(self, *args, **kwargs):
+        ''' Buffer text - from any thread - for flush_output(). '''
         # Add text with the 'default_text' tag
         lines = API.parse_ccodes(args)
         sep = '\n'
         if 'sep' in kwargs:
             sep = kwargs['sep']
         tag =  None
+        chunks = []
         for line in lines:
             for value in line:
                 if 'tag' in kwargs:
@@ -206,11 +268,41 @@ class GuiApp(tk.Tk):
                     tag = 'hi_text'
                 elif value[0] == API.CUSER:
                     tag = 'user_text'
-                self.text_display.insert(
-                    tk.END, f"{value[1]}", tag)
-            self.text_display.insert(
-                tk.END, f"{sep}", tag)
-        self.text_display.see(tk.END)  # Auto-scroll
+                chunks.append((value[1], tag))
+            chunks.append((sep, tag))
+        with self.out_lock:
+            self.out_chunks.extend(chunks)
+            if self.out_queued:
+                return
+            self.out_queued = True
+        if self.worker.on_worker():
+            self.worker.call_main(self.flush_output)
+        else:
+            self.after_idle(self.flush_output)
+
+    def flush_output(self):
+        ''' Write the buffered text: one insert, one trim, one scroll. '''
+        with self.out_lock:
+            chunks = self.out_chunks
+            self.out_chunks = []
+            self.out_queued = False
+        if not chunks:
+            return
+        parts = []; texts = []; last = chunks[0][1]
+        for text, tag in chunks: # merge runs of the same tag
+            if tag != last:
+                parts += (''.join(texts), last)
+                texts = []; last = tag
+            texts.append(text)
+        parts += (''.join(texts), last)
+        try:
+            self.text_display.insert(tk.END, *parts)
+            lines = int(self.text_display.index('end-1c').split('.')[0])
+            if lines > self.scrollback:
+                self.text_display.delete('1.0', f'{lines - self.scrollback + 1}.0')
+            self.text_display.see(tk.END)  # Auto-scroll
+        except tk.TclError:
+            pass # window closed
 
     def push_ops(self):
         self.ops_stack.append([self.ops, self.options, self.menu_title])
@@ -219,7 +311,10 @@ class GuiApp(tk.Tk):
         if not self.ops_stack:
             # We're done!
             self.is_app_done = True
-            self.destroy()
+            if self.worker.on_worker():
+                self.worker.call_main(self.destroy)
+            else:
+                self.destroy()
         else:
             # Show previous menu options:
             frame = self.ops_stack.pop()
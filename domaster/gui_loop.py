@@ -10,16 +10,20 @@ import sys
 if '..' not in sys.path:
     sys.path.insert(0, '..')
 from domaster.ui_loop import *
-from domaster.gui_colors import COLORS
 from domaster.gui_app import GuiApp
 
+def get_colors()->dict:
+    ''' The (large) color table - loaded on first use. '''
+    from domaster.gui_colors import COLORS
+    return COLORS
+
 class GuiLoop(MenuDriver):
     ''' Base class for all GUI looping menu 'ops '''
     def __init__(self, ops, options, VERSION):
         ''' Prep menu instance for looping. '''
         super().__init__()
-        self.fore = COLORS['yellow']
-        self.back = COLORS['darkgreen']
+        self.fore = '#ffff14' # COLORS['yellow']
+        self.back = '#054907' # COLORS['darkgreen']
         self.app = GuiApp(ops, options, VERSION)
         print("GUI detected.")
 
@@ -29,6 +33,7 @@ class GuiLoop(MenuDriver):
         returned.
         '''
         ofore = self.fore; oback = self.back; br = False
+        COLORS = get_colors()
         if fore in COLORS:
             self.fore = COLORS[fore]
             br = True
@@ -0,0 +1,399 @@
+# MISSION: One HTML report engine for every DoMaster front end.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: A single ordered pass over todo feeds any number of
+# reports; rows stream through - memory does not grow with tasks.
+# write_site() splits very large reports into pages + an index.
+# DATE: 2026-10-18 18:40:12
+# FILE: html_report.py
+# AUTHOR: Randall Nagy
+#
+import os, sys
+import re
+import html
+import json
+import sqlite3
+import hashlib
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster.task_row import batches
+from domaster.db_pool import read_only
+
+BUFFER_BYTES = 1 << 16
+PAGE_ROWS = 500     # most tasks per site page
+INLINE_PAGES = 4    # fewer changed pages than this skip the process pool
+MANIFEST = 'manifest.json'
+_START = object() # before the first group
+
+# As DoMaster.get_list_query() - every row, in report order:
+QUERY = ("SELECT t.*, n.ID AS next_id FROM todo t"
+         " LEFT JOIN todo n ON n.uuid = t.next_task"
+         " ORDER BY t.project_name ASC, t.task_priority ASC, t.date_created")
+
+def humanize(tag:str)->str:
+    ''' As DoMaster.humanize(): 'task_priority' -> 'Task Priority' '''
+    return tag.replace('_', ' ').title()
+
+def is_done(row, done_col)->bool:
+    return bool(row[done_col])
+
+
+class Report:
+    '''
+One output file. stream() calls begin(names) once, then add(row)
+for every row that wants(row), then close(). Rows are tuples in
+`names` order.
+'''
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.file = None
+
+    def begin(self, names):
+        self.names = list(names)
+        self.col = {name: ss for ss, name in enumerate(self.names)}
+        self.file = open(self.path, 'w', encoding='utf-8', buffering=BUFFER_BYTES)
+        self.file.write(self.header())
+
+    def wants(self, row)->bool:
+        return True
+
+    def add(self, row):
+        self.count += 1
+        self.file.write(self.render(row))
+
+    def close(self)->int:
+        if self.file:
+            self.file.write(self.footer())
+            self.file.close()
+            self.file = None
+        return self.count
+
+    def header(self)->str:
+        return "<html><body>"
+
+    def render(self, row)->str:
+        return ''
+
+    def footer(self)->str:
+        return "</body></html>\n"
+
+
+class GroupReport(Report):
+    '''
+The DoMaster report: PENDING tasks grouped by project, or DONE
+tasks grouped by date done - every field, one task per rule.
+'''
+    def __init__(self, path, status="pending"):
+        super().__init__(path)
+        self.status = status
+        self.group = _START
+
+    def begin(self, names):
+        super().begin(names)
+        self.done_col = self.col['date_done']
+        self.group_col = self.col['project_name' if self.status == "pending" else 'date_done']
+        next_col = self.col['next_id']
+        # (label, column) - Next Task shows the next task's ID:
+        self.fields = [(humanize(tag), next_col if tag == 'next_task' else ss)
+                       for ss, tag in enumerate(self.names) if tag not in ('uuid', 'next_id', 'change_seq')]
+        self.next_col = next_col
+
+    def wants(self, row)->bool:
+        return is_done(row, self.done_col) == (self.status == "done")
+
+    def header(self)->str:
+        return f"<html><body><h1>DoMaster [{self.status.upper()}] Report</h1>"
+
+    def render(self, row)->str:
+        parts = []
+        if row[self.group_col] != self.group:
+            self.group = row[self.group_col]
+            parts.append(f"<h2>{html.escape(str(self.group))}</h2>")
+        parts.append('<hr>')
+        for label, col in self.fields:
+            value = row[col]
+            if col == self.next_col:
+                value = value or 0
+            parts.append(f"<b>{label}:</b>&nbsp;&nbsp;{html.escape(str(value))}<br>")
+        return ''.join(parts)
+
+
+class TableReport(Report):
+    ''' Every task in one styled table - the DoMaster Pro export. '''
+    STYLE = ("body{font-family:sans-serif;margin:40px;} table{width:100%;border-collapse:collapse;}"
+             " th,td{padding:12px;border:1px solid #ccc;text-align:left;} th{background:#eee;}"
+             " .done{background:#f0f0f0;color:#777;text-decoration:line-through;} .todo{color:blue;}")
+    COLUMNS = ('ID', 'project_name', 'date_created', 'task_description', 'task_priority')
+
+    def __init__(self, path, title="DoMaster"):
+        super().__init__(path)
+        self.title = html.escape(title)
+
+    def begin(self, names):
+        super().begin(names)
+        self.cols = [self.col[name] for name in self.COLUMNS]
+        self.done_col = self.col['date_done']
+
+    def header(self)->str:
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+        return (f"<html><head><title>{self.title} Export</title><style>{self.STYLE}</style></head><body>"
+                f"<h1>{self.title} Report</h1><p>Exported: {now}</p><table><tr><th>ID</th><th>Project</th>"
+                "<th>Created</th><th>Description</th><th>Priority</th><th>Status</th></tr>\n")
+
+    def render(self, row)->str:
+        done = is_done(row, self.done_col)
+        cells = ''.join(f"<td>{html.escape(str(row[col]))}</td>" for col in self.cols)
+        return (f"<tr class='{'done' if done else 'todo'}'>{cells}"
+                f"<td>{'Completed' if done else 'Pending'}</td></tr>\n")
+
+    def footer(self)->str:
+        return "</table></body></html>\n"
+
+
+def stream(conn, reports, progress=None, check=None)->int:
+    ''' Write every report from one ordered pass over todo.
+        progress(done, total) and check() are called per batch.
+        Returns the number of rows read.
+    '''
+    total = conn.execute("SELECT COUNT(*) FROM todo").fetchone()[0] if progress else 0
+    cursor = conn.execute(QUERY)
+    names = [d[0] for d in cursor.description]
+    done = 0
+    try:
+        for report in reports:
+            report.begin(names)
+        for batch in batches(cursor):
+            if check:
+                check()
+            for row in batch.rows():
+                for report in reports:
+                    if report.wants(row):
+                        report.add(row)
+            done += len(batch)
+            if progress:
+                progress(done, total)
+    finally:
+        for report in reports:
+            report.close()
+    return done
+
+
+# --- Paginated sites ---
+# Pending pages group by project, done pages by day. Each page's rows
+# are hashed in one ordered pass; only pages whose hash moved since the
+# last run (see MANIFEST) are written - in parallel, by worker processes
+# that read their own rows.
+
+SITE_GROUP = {
+    'pending': ("IFNULL(t.project_name, '')",
+                "(t.date_done IS NULL OR t.date_done = '')"),
+    'done': ("substr(t.date_done, 1, 10)",
+             "t.date_done IS NOT NULL AND t.date_done != ''"),
+    }
+SITE_ORDER = " ORDER BY grp, t.task_priority, t.date_created, t.ID"
+
+def site_query(status)->str:
+    grp, where = SITE_GROUP[status]
+    return (f"SELECT {grp} AS grp, t.*, n.ID AS next_id FROM todo t"
+            f" LEFT JOIN todo n ON n.uuid = t.next_task WHERE {where}")
+
+def page_name(status, group, page)->str:
+    ''' A file-system safe, collision free, stable page name. '''
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', str(group))[:40].strip('_') or 'none'
+    tag = hashlib.sha1(str(group).encode('utf-8')).hexdigest()[:8]
+    return f"{status}_{slug}_{tag}_{page:03}.html"
+
+def write_atomic(path, text):
+    temp = path + '.tmp'
+    with open(temp, 'w', encoding='utf-8', buffering=BUFFER_BYTES) as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+class PageReport(GroupReport):
+    ''' One page of a group, with index / previous / next links. '''
+    def __init__(self, path, status, group, page, pages):
+        super().__init__(path, status)
+        self.title = group
+        self.page = page
+        self.pages = pages
+
+    def link(self, page, text)->str:
+        name = page_name(self.status, self.title, page)
+        return f"<a href='{html.escape(name)}'>{text}</a>"
+
+    def header(self)->str:
+        nav = [f"<a href='{self.status}_index.html'>Index</a>"]
+        if self.page > 1:
+            nav.append(self.link(self.page - 1, 'Previous'))
+        if self.page < self.pages:
+            nav.append(self.link(self.page + 1, 'Next'))
+        return (f"<html><body><h1>DoMaster [{self.status.upper()}] Report</h1>"
+                f"<h2>{html.escape(str(self.title) or '(none)')}</h2>"
+                f"<p>{' | '.join(nav)} - page {self.page} of {self.pages}</p>")
+
+    def render(self, row)->str:
+        self.group = row[self.group_col] # one group per page: no sub-headings
+        return super().render(row)
+
+
+def _write_page(job)->str:
+    ''' Process pool worker: read + write one page. '''
+    db_file, folder, status, group, page, pages, page_rows = job
+    name = page_name(status, group, page)
+    conn = sqlite3.connect(read_only(db_file), uri=True)
+    try:
+        grp = SITE_GROUP[status][0]
+        cursor = conn.execute(site_query(status) + f" AND {grp} = ?" + SITE_ORDER
+                              + " LIMIT ? OFFSET ?", (group, page_rows, (page - 1) * page_rows))
+        names = [d[0] for d in cursor.description][1:]
+        report = PageReport(os.path.join(folder, name + '.tmp'), status, group, page, pages)
+        report.begin(names)
+        try:
+            for batch in batches(cursor):
+                for row in batch.rows():
+                    report.add(row[1:])
+        finally:
+            report.close()
+        os.replace(report.path, os.path.join(folder, name))
+    finally:
+        conn.close()
+    return name
+
+def write_index(folder, status, groups):
+    ''' groups: [(group, count, pages)] '''
+    parts = [f"<html><body><h1>DoMaster [{status.upper()}] Report</h1>",
+             f"<p>{sum(g[1] for g in groups)} tasks in {len(groups)} groups.</p><ul>"]
+    for group, count, pages in groups:
+        links = ' '.join(f"<a href='{html.escape(page_name(status, group, page))}'>{page}</a>"
+                         for page in range(1, pages + 1))
+        parts.append(f"<li><b>{html.escape(str(group) or '(none)')}</b> - {count} tasks: {links}</li>")
+    parts.append("</ul></body></html>\n")
+    write_atomic(os.path.join(folder, f"{status}_index.html"), ''.join(parts))
+
+def write_site(db_file, folder, statuses=('pending', 'done'),
+               page_rows=PAGE_ROWS, workers=None)->dict:
+    ''' Write (or bring up to date) a paged report site in folder.
+        Returns {'pages', 'written', 'skipped', 'removed', <status>: tasks}
+    '''
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, MANIFEST)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        old = {}
+    old_pages = old.get('pages', {}) if old.get('page_rows') == page_rows else {}
+    pages = {}; jobs = []; result = {'pages': 0, 'written': 0, 'skipped': 0, 'removed': 0}
+    conn = sqlite3.connect(read_only(db_file), uri=True)
+    try:
+        for status in statuses:
+            groups = []; total = 0
+            cursor = conn.execute(site_query(status) + SITE_ORDER)
+            group = _START; count = 0; digest = None
+            def finish():
+                # A page's rows are all read: record their hash.
+                if digest is not None:
+                    pages[page_name(status, group, (count - 1) // page_rows + 1)] = digest.hexdigest()
+            for batch in batches(cursor):
+                for row in batch.rows():
+                    if row[0] != group:
+                        finish()
+                        if group is not _START:
+                            groups.append((group, count, (count - 1) // page_rows + 1))
+                        group = row[0]; count = 0; digest = None
+                    if count % page_rows == 0:
+                        finish()
+                        digest = hashlib.sha1()
+                    digest.update(repr(row).encode('utf-8'))
+                    count += 1
+                    total += 1
+            finish()
+            if group is not _START:
+                groups.append((group, count, (count - 1) // page_rows + 1))
+            write_index(folder, status, groups)
+            result[status] = total
+            for group, count, npages in groups:
+                for page in range(1, npages + 1):
+                    name = page_name(status, group, page)
+                    # A page's links depend on the page count, too:
+                    pages[name] = hashlib.sha1(f"{pages[name]}/{npages}".encode()).hexdigest()
+                    if old_pages.get(name) == pages[name] and os.path.exists(os.path.join(folder, name)):
+                        result['skipped'] += 1
+                    else:
+                        jobs.append((db_file, folder, status, group, page, npages, page_rows))
+    finally:
+        conn.close()
+    links = ''.join(f"<li><a href='{status}_index.html'>{status.title()}</a> - {result[status]} tasks</li>"
+                    for status in statuses)
+    write_atomic(os.path.join(folder, 'index.html'),
+                 f"<html><body><h1>DoMaster Report</h1><ul>{links}</ul></body></html>\n")
+    if len(jobs) < INLINE_PAGES:
+        for job in jobs:
+            _write_page(job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_write_page, jobs, chunksize=4))
+    result['written'] = len(jobs)
+    result['pages'] = len(pages)
+    for name in old.get('pages', {}):
+        if name not in pages and os.path.exists(os.path.join(folder, name)):
+            os.unlink(os.path.join(folder, name))
+            result['removed'] += 1
+    write_atomic(path, json.dumps({'page_rows': page_rows,
+                                   'pages': pages}))
+    return result
+
+
+if __name__ == '__main__':
+    import os, sqlite3, tempfile
+    from domaster import schema
+    zdir = tempfile.mkdtemp()
+    conn = sqlite3.connect(':memory:')
+    schema.migrate(conn)
+    conn.executemany(
+        "INSERT INTO todo (uuid, project_name, task_description, task_priority, date_done, next_task)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        [(f'u{ss}', f'p{ss % 3}', f'<task {ss}>', ss % 5,
+          '2026-01-01' if ss % 4 == 0 else None, f'u{ss + 1}') for ss in range(1000)])
+    pending = GroupReport(os.path.join(zdir, 'pending.html'), "pending")
+    finished = GroupReport(os.path.join(zdir, 'done.html'), "done")
+    table = TableReport(os.path.join(zdir, 'all.html'))
+    if stream(conn, [pending, finished, table]) != 1000:
+        print("Error 010: stream failure.")
+        sys.exit(10)
+    if (pending.count, finished.count, table.count) != (750, 250, 1000):
+        print("Error 020: routing failure.")
+        sys.exit(20)
+    with open(pending.path, encoding='utf-8') as f:
+        text = f.read()
+    if text.count('<h2>') != 3 or '&lt;task 1&gt;' not in text or '<task' in text:
+        print("Error 030: group / escape failure.")
+        sys.exit(30)
+    db_file = os.path.join(zdir, 'site.db')
+    disk = sqlite3.connect(db_file)
+    conn.commit()
+    conn.backup(disk)
+    site = os.path.join(zdir, 'site')
+    first = write_site(db_file, site, page_rows=100)
+    if (first['pages'], first['written'], first['pending'], first['done']) != (12, 12, 750, 250):
+        print("Error 040: site failure.", first)
+        sys.exit(40)
+    if write_site(db_file, site, page_rows=100)['written'] != 0:
+        print("Error 050: unchanged pages were written.")
+        sys.exit(50)
+    disk.execute("UPDATE todo SET task_description = 'changed' WHERE uuid = 'u1'")
+    disk.commit()
+    again = write_site(db_file, site, page_rows=100)
+    if (again['written'], again['skipped']) != (1, 11):
+        print("Error 060: changed page failure.", again)
+        sys.exit(60)
+    with open(os.path.join(site, 'pending_index.html'), encoding='utf-8') as f:
+        if f.read().count('<li>') != 3:
+            print("Error 070: index failure.")
+            sys.exit(70)
+    print("Testing Success!")
@@ -1,18 +1,97 @@
 # MISSION: Maintain a set of global parameters witin any user's home-directory.
 # STATUS: Research
-# VERSION: 1.0.1
+# VERSION: 1.1.0
 # NOTES: Testing Success - See the project for full documentation.
+# Reads are cached until the file's mtime / size change; writes are
+# atomic (temp file + rename) under an advisory lock. Callers get
+# copies - never the cached data itself.
 # DATE: 2026-02-07 09:07:21
 # FILE: keeper.py
 # AUTHOR: Randall Nagy
 #
 import os
+import copy
 import json
+import tempfile
+import threading
 from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
 
 OM_TYPE = '.json7'
 OM_NAME = '.tp_keeper_keeps'
 
+_cache = {}   # file path -> ((inode, mtime_ns, size), data)
+_batches = {} # file path -> [depth, data] while Keeps.batch() is open
+_guard = threading.RLock()
+
+def _stamp(filepath):
+    try:
+        info = os.stat(filepath)
+    except OSError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+def _read(filepath):
+    ''' The (shared, cached) data in filepath - else None. '''
+    batch = _batches.get(filepath)
+    if batch:
+        return batch[1]
+    stamp = _stamp(filepath)
+    if stamp is None:
+        _cache.pop(filepath, None)
+        return None
+    cached = _cache.get(filepath)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    try:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+    except:
+        return None
+    _cache[filepath] = (stamp, data)
+    return data
+
+def _write(filepath, data):
+    ''' Replace filepath in one step - readers see old or new, never half. '''
+    fd, temp = tempfile.mkstemp(prefix=os.path.basename(filepath),
+                                dir=os.path.dirname(filepath) or '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, filepath)
+    except:
+        if os.path.exists(temp):
+            os.unlink(temp)
+        raise
+    _cache[filepath] = (_stamp(filepath), copy.deepcopy(data))
+
+@contextmanager
+def _locked(filepath):
+    ''' Advisory lock - one writer per options file, across processes. '''
+    with _guard:
+        with open(filepath + '.lock', 'a+') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
 class Keeps:
     '''
 Pure API class to manage object /
@@ -39,57 +118,88 @@ Fully qualified paths will be 'homed into any user's same.
     @staticmethod
     def get_dict(file_name=None):
         """ Read data if it exists."""
-        filepath = Keeps.name_file(file_name)
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return None
+        data = _read(Keeps.name_file(file_name))
+        return None if data is None else copy.deepcopy(data)
 
     @staticmethod
     def put_dict(obj, file_name=None)->bool:
         if not isinstance(obj, dict):
             return False
         filepath = Keeps.name_file(file_name)
+        batch = _batches.get(filepath)
+        if batch:
+            batch[1].clear()
+            batch[1].update(copy.deepcopy(obj))
+            return True
         try:
-            with open(filepath, 'w') as f:
-                json.dump(obj, f, indent=4)
+            with _locked(filepath):
+                _write(filepath, dict(obj))
             return os.path.exists(filepath)
-        except IOError as e:
+        except (IOError, TypeError, ValueError) as e:
             pass
         return False
 
+    @staticmethod
+    @contextmanager
+    def batch(file_name=None):
+        '''
+Change many options, writing once: the options dictionary is
+read under the lock and written back - if changed - on exit.
+add_option / del_option calls within the block join it.
+Raises OSError when the write fails.'''
+        filepath = Keeps.name_file(file_name)
+        with _guard:
+            batch = _batches.get(filepath)
+            if batch: # nested
+                batch[0] += 1
+                try:
+                    yield batch[1]
+                finally:
+                    batch[0] -= 1
+                return
+            with _locked(filepath):
+                data = _read(filepath)
+                data = copy.deepcopy(data) if data else dict()
+                before = copy.deepcopy(data)
+                _batches[filepath] = [1, data]
+                try:
+                    yield data
+                finally:
+                    del _batches[filepath]
+                if data != before or not os.path.exists(filepath):
+                    _write(filepath, data)
+
     @staticmethod
     def add_option(tag, value, file_name=None)->bool:
         '''
 Add an option into the file-name.
 Create option file if not found. '''
-        data = Keeps.get_dict(file_name)
-        if not data:
-            data = dict()
-        if tag:
-            data[tag] = value
-        return Keeps.put_dict(data, file_name)
+        try:
+            with Keeps.batch(file_name) as data:
+                if tag:
+                    data[tag] = value
+        except (IOError, TypeError, ValueError) as e:
+            return False
+        return True
 
     @staticmethod
     def del_option(tag, file_name=None)->bool:
         ''' Remove an option from the file_name. '''
-        data = Keeps.get_dict(file_name)
-        if not data:
+        if not Keeps.get_dict(file_name):
+            return False
+        try:
+            with Keeps.batch(file_name) as data:
+                data.pop(tag, None)
+        except (IOError, TypeError, ValueError) as e:
             return False
-        if tag and tag in data:
-            del data[tag]
-            return Keeps.put_dict(data, file_name)
         return True
 
     @staticmethod
     def get_option(tag, file_name=None, default_value=False)->bool:
         ''' Get an option from the file_name. '''
-        data = Keeps.get_dict(file_name)
+        data = _read(Keeps.name_file(file_name))
         if data and tag in data:
-            return data[tag]
+            return copy.deepcopy(data[tag])
         return default_value
 
     @staticmethod
@@ -142,7 +252,49 @@ if __name__ == "__main__":
         print("Error 040: del_option failure")
         sys.exit(40)
         
+    with Keeps.batch(test_file) as opts:
+        opts['a'] = 1
+        Keeps.add_option('b', 2, test_file)
+        with open(zname) as f:
+            on_disk = json.load(f)
+        if on_disk or Keeps.get_dict(test_file) != {'a': 1, 'b': 2}:
+            print("Error 050: batch failure")
+            sys.exit(50)
+    with open(zname) as f:
+        if json.load(f) != {'a': 1, 'b': 2}:
+            print("Error 060: batch write failure")
+            sys.exit(60)
+    with open(zname, 'w') as f: # another process
+        f.write('{"a": 3}')
+    if Keeps.get_option('a', test_file) != 3:
+        print("Error 070: cache invalidation failure")
+        sys.exit(70)
+    # Nested values - changed and put back - are written:
+    Keeps.add_option('m', {'k': 1}, test_file)
+    found = Keeps.get_option('m', test_file)
+    found['k'] = 2
+    if Keeps.get_option('m', test_file) != {'k': 1}:
+        print("Error 072: get_option copy failure")
+        sys.exit(72)
+    Keeps.add_option('m', found, test_file)
+    with open(zname) as f:
+        if json.load(f)['m'] != {'k': 2}:
+            print("Error 073: changed option write failure")
+            sys.exit(73)
+    with Keeps.batch(test_file) as opts:
+        opts['m']['k'] = 3
+    with open(zname) as f:
+        if json.load(f)['m'] != {'k': 3}:
+            print("Error 075: nested option write failure")
+            sys.exit(75)
+    Keeps.del_option('m', test_file)
+    if [f for f in os.listdir(os.path.dirname(zname)) if f.startswith(os.path.basename(zname) + '.')
+        and not f.endswith('.lock')]:
+        print("Error 080: temp file left over")
+        sys.exit(80)
+
     os.unlink(zname)
+    os.unlink(zname + '.lock')
     if os.path.exists(zname):
         print("Error 090: add_option failure")
         sys.exit(90)
@@ -183,6 +335,7 @@ if __name__ == "__main__":
     zname = Keeps.name_file()
     print(f'Removing {zname}...')
     os.unlink(zname)
+    os.unlink(zname + '.lock')
     if os.path.exists(zname):
         print("Error 900: Unable to remove file.")
         sys.exit(900)
@@ -6,21 +6,23 @@
 # FILE: main.py
 # AUTHOR: Randall Nagy
 #
-import os, sys, shutil
-from pathlib import Path
-import sqlite3
+import os, sys
 import uuid
-import csv
 import datetime
 
 if '..' not in sys.path:
     sys.path.insert(0, '..')
 
-from domaster.manage_files import ManageFiles
-from domaster.manage_archive import ManageArchived
 from domaster.ui_loop import API, MenuLoop
+from domaster.db_pool import DbPool
+from domaster import schema
+from domaster import search
+from domaster import task_graph
+from domaster.scheduler import Scheduler
+from domaster.task_cache import TaskCache
+from domaster.task_pager import TaskPager
 
-from domaster.keeper import Keeps
+# ManageFiles, ManageArchived & Keeps load when first needed.
 
 APP_NAME  = "DoMaster"
 FILE_TYPE = ".db"
@@ -28,26 +30,41 @@ FILE_ROOT = "domaster" + FILE_TYPE
 VERSION   = APP_NAME + " 2026.04.25"
 DATA_TYPE = ".options"
 
+# List views a full-screen driver pages through (see API.page_rows):
+PAGE_VIEWS = {
+    'all': "",
+    'pending': "date_done IS NULL OR date_done = ''",
+    'done': "date_done IS NOT NULL AND date_done != ''",
+    }
+PAGE_COLUMNS = "*, (SELECT n.ID FROM todo n WHERE n.uuid = todo.next_task) AS next_id"
+
 class DoMaster(MenuLoop):
     def __init__(self, db_file=None):
         super().__init__()
         self.db_file = None
         self.is_global = True
+        self.pool = DbPool()
+        self.migrated = set() # db files known to be up to date
+        self.scheduler = Scheduler()
+        self.cache = TaskCache()
+        self.graphs = task_graph.GraphCache()
         if not db_file:
             self.use_global_db()
         else:
             self.use_local_db()
-        if not os.path.exists(self.db_file):
-            self.init_db()
+        self.init_db()
 
     def do_app_exit(self):
         ''' Quit DoMaster '''
+        from domaster.keeper import Keeps
         if Keeps.get_option('auto_backup'):
+            from domaster.manage_archive import ManageArchived
             util = ManageArchived(self)
             if util.create_archive():
                 API.do_print("Success: Backup created.")
             else:
                 API.do_print("Warning: Auto backup ignored.")
+        self.pool.close()
         API.do_quit()
 
     def loop_status(self, **kwargs):
@@ -71,12 +88,20 @@ class DoMaster(MenuLoop):
         ''' Use the PWD / FOLDER database. '''
         self.db_file = os.path.join(os.getcwd(), FILE_ROOT)
         self.is_global = False
+        if self.pool.use(self.db_file):
+            self.scheduler.reset()
+            self.cache.clear()
+            self.graphs.clear()
 
     def use_global_db(self):
         ''' Use the MODULE / GLOBAL database. '''
         root = os.path.dirname(os.path.abspath(__file__))
         self.db_file = os.path.join(root, FILE_ROOT)
         self.is_global = True
+        if self.pool.use(self.db_file):
+            self.scheduler.reset()
+            self.cache.clear()
+            self.graphs.clear()
 
     def is_same_db(self):
         ''' Edgy condition - some times they're the same. '''
@@ -92,6 +117,12 @@ class DoMaster(MenuLoop):
             zfile = '...' + zfile[-40:]
         return zfile
 
+    def other_db_file(self)->str:
+        ''' The database swap_db() would switch to. '''
+        if self.is_db_global():
+            return os.path.join(os.getcwd(), FILE_ROOT)
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), FILE_ROOT)
+
     def swap_db(self):
         ''' Toggle GLOBAL database on/off. '''
         if self.is_db_global():
@@ -134,35 +165,21 @@ class DoMaster(MenuLoop):
         return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     def init_db(self):
-        ''' Create table if not exist. '''
-        conn = sqlite3.connect(self.db_file)
-        conn.execute(f"""
-            CREATE TABLE IF NOT EXISTS todo (
-                ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                uuid TEXT UNIQUE,
-                project_name TEXT,
-                date_created TEXT,
-                date_done TEXT,
-                task_description TEXT,
-                task_priority INTEGER,
-                next_task TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
+        ''' Create / upgrade the schema - once per database file. '''
+        if self.db_file in self.migrated and os.path.exists(self.db_file):
+            return
+        schema.migrate(self.pool.connect())
+        self.migrated.add(self.db_file)
 
     def count(self):
         ''' Count the items in the TODO table. '''
         try:
-            conn = sqlite3.connect(self.db_file)
+            conn = self.pool.connect()
             count_query = f"SELECT COUNT(*) FROM todo;"
-            result = conn.execute(count_query)
-            tally = int(result.fetchone()[0])
-            return tally
+            return self.cache.get(conn, ('count',),
+                lambda: int(conn.execute(count_query).fetchone()[0]))
         except Exception as ex:
             API.do_print(ex)
-        finally:
-            conn.close()
         return 0
 
     def add_task(self):
@@ -180,42 +197,35 @@ class DoMaster(MenuLoop):
                 API.do_print(f"Task #{next_t} not found. Set to Zero.")
                 next_t = 0
         
-        conn = sqlite3.connect(self.db_file)
-        conn.execute("""INSERT INTO todo (uuid, project_name, date_created, task_description, task_priority, next_task) 
+        conn = self.pool.connect()
+        self.scheduler.check(conn)
+        cursor = conn.execute("""INSERT INTO todo (uuid, project_name, date_created, task_description, task_priority, next_task) 
                      VALUES (?, ?, ?, ?, ?, ?)""", 
                      (str(uuid.uuid4()),
                       proj, self.get_now(),
                       desc, pri, next_t))
         conn.commit()
-        conn.close()
+        self.scheduler.on_add(conn, cursor.lastrowid)
         API.do_print("Task added successfully.")
 
-    def read_row_for_uuid(self, next_t:str)->dict:
-        ''' Lookup a task by uuid. None if not found. '''
+    def read_row_for_uuid(self, next_t:str):
+        ''' Lookup a task (a read-only Task row) by uuid. None if not found. '''
         try:
-            conn = sqlite3.connect(self.db_file)
-            conn.row_factory = sqlite3.Row
-            res = conn.execute(f'SELECT * FROM todo WHERE uuid = "{next_t}" LIMIT 1;')
-            if res:
-                return dict(res.fetchone())
+            conn = self.pool.connect()
+            return self.cache.get(conn, ('uuid', next_t), lambda: conn.execute(
+                'SELECT * FROM todo WHERE uuid = ? LIMIT 1;', (next_t,)).fetchone())
         except:
             pass
-        finally:
-            conn.close()
         return None
 
-    def read_row_for_id(self, next_t:int)->dict:
-        ''' Lookup a task by primary key. None if not found. '''
+    def read_row_for_id(self, next_t:int):
+        ''' Lookup a task (a read-only Task row) by primary key. None if not found. '''
         try:
-            conn = sqlite3.connect(self.db_file)
-            conn.row_factory = sqlite3.Row
-            res = conn.execute(f'SELECT * FROM todo WHERE ID = {next_t} LIMIT 1;')
-            if res:
-                return dict(res.fetchone())
+            conn = self.pool.connect()
+            return self.cache.get(conn, ('id', next_t), lambda: conn.execute(
+                'SELECT * FROM todo WHERE ID = ? LIMIT 1;', (next_t,)).fetchone())
         except:
             pass
-        finally:
-            conn.close()
         return None
 
     def delete_task(self)->None:
@@ -227,22 +237,28 @@ class DoMaster(MenuLoop):
         tid = API.get_int("Enter ID to delete: ")
         if not tid:
             return
-        conn = sqlite3.connect(self.db_file)
-        conn.execute(f"DELETE FROM todo WHERE ID = {tid}")
+        conn = self.pool.connect()
+        self.scheduler.check(conn)
+        conn.execute("DELETE FROM todo WHERE ID = ?", (tid,))
         conn.commit()
-        conn.close()
+        self.scheduler.on_delete(conn, tid)
 
     def display(self, row):
         if not row:
             API.do_print("Unable to display [{row}].")
             return
         API.do_print('~'*15)
+        next_t = row['next_task']
+        if 'next_id' in row.keys():
+            next_t = row['next_id'] or 0
         API.do_print(f"ID      : [{API.CALT}{row['ID']}{API.CALT}]")
-        API.do_print(f"Next    : [{API.CALT}{row['next_task']}{API.CALT}]")
+        API.do_print(f"Next    : [{API.CALT}{next_t}{API.CALT}]")
         API.do_print(f"Project : [{API.CALT}{row['project_name']}{API.CALT}]")
         API.do_print(f"Priority: [{API.CALT}{row['task_priority']}{API.CALT}]")
         API.do_print(f"Created : [{API.CALT}{row['date_created']}{API.CALT}]")
         API.do_print(f"Description: \n\t  [{API.CALT}{row['task_description']}{API.CALT}]")
+        if 'snippet' in row.keys() and row['snippet']:
+            API.do_print(f"Match   : [{row['snippet']}]")
 
     def display_task_id(self, tid)->bool:
         a_row = self.read_row_for_id(tid)
@@ -288,10 +304,11 @@ class DoMaster(MenuLoop):
                 API.do_print(f"Task #{new_val} not found. Ignored.")
                 return
                 
-        conn = sqlite3.connect(self.db_file)
+        conn = self.pool.connect()
+        self.scheduler.check(conn)
         conn.execute(f"UPDATE todo SET {field} = ? WHERE ID = ?", (new_val, tid))
         conn.commit()
-        conn.close()
+        self.scheduler.on_update(conn, tid)
 
     def mark_done(self):
         ''' Date task ID completed. '''
@@ -304,64 +321,79 @@ class DoMaster(MenuLoop):
         if not row:
             API.do_print(f"Task #{tid} not found.")
             return
-        else:
-            tid = row['uuid']            
-        conn = sqlite3.connect(self.db_file)
+        conn = self.pool.connect()
+        self.scheduler.check(conn)
         conn.execute("UPDATE todo SET date_done = ? WHERE uuid = ?",
-                     (self.get_now(), tid))
+                     (self.get_now(), row['uuid']))
         conn.commit()
-        conn.close()
+        self.scheduler.on_done(conn, row['ID'])
 
     def get_task_numbers(self)->list:
         ''' Return the ID's of all tasks. '''
         result = []
         query =  f"SELECT ID FROM todo ORDER BY ID"        
-        conn = sqlite3.connect(self.db_file)
+        conn = self.pool.connect()
         rows = conn.execute(query).fetchall()
         for id_num in rows:
             result.append(id_num[0])
-        conn.close()
         return result
 
     def show_task_numbers(self, wide=12)->None:
         ''' Display the ID's of all tasks. '''
+        if API.can_page(): # the list views can find any ID
+            low, high = self.pool.connect().execute("SELECT MIN(ID), MAX(ID) FROM todo").fetchone()
+            API.do_print(f"{self.count()} tasks, #{low} to #{high}.")
+            return
         for ss, id_num in enumerate(self.get_task_numbers()):
             if ss % wide == 0:
                 API.do_print()
             API.do_print(f'#[{id_num:03}] ', end = '')
         API.do_print()
 
-    def get_list_query(self, filter_type):
-        query = f"SELECT * FROM todo"
+    def get_list_query(self, filter_type, where=None):
+        ''' Rows + the ID of each `next_task`, as `next_id`. Any
+            `where` (its ? parameters are the caller's) is ANDed on.
+        '''
+        query = ("SELECT t.*, n.ID AS next_id FROM todo t"
+                 " LEFT JOIN todo n ON n.uuid = t.next_task")
+        terms = []
         if filter_type == "pending":
-            query += " WHERE date_done IS NULL OR date_done = ''"
+            terms.append("(t.date_done IS NULL OR t.date_done = '')")
         elif filter_type == "done":
-            query += " WHERE date_done IS NOT NULL AND date_done != ''"
+            terms.append("(t.date_done IS NOT NULL AND t.date_done != '')")
         elif filter_type == "all":
             pass
         elif filter_type:
-            query += f' WHERE project_name LIKE "%{filter_type}%" OR task_description LIKE "%{filter_type}%"' 
-        query += " ORDER BY project_name ASC, task_priority ASC, date_created"
+            terms.append(f'(t.project_name LIKE "%{filter_type}%" OR t.task_description LIKE "%{filter_type}%")')
+        if where:
+            terms.append(f"({where})")
+        if terms:
+            query += " WHERE " + " AND ".join(terms)
+        query += " ORDER BY t.project_name ASC, t.task_priority ASC, t.date_created"
         return query
 
+    def get_rows(self, filter_type="all")->list:
+        ''' The (cached, read-only) rows of a list view. '''
+        conn = self.pool.connect()
+        query = self.get_list_query(filter_type)
+        return self.cache.get(conn, ('list', filter_type),
+                              lambda: conn.execute(query).fetchall())
+
     def list_tasks(self,filter_type="all")->int:
         ''' Returns the number of tasks shown. '''
         API.do_print(self.short_db_name())
-        fields = self.get_fields()
-        query = self.get_list_query(filter_type)
-        conn = sqlite3.connect(self.db_file)
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute(query).fetchall()
+        if filter_type in PAGE_VIEWS and API.can_page():
+            pager = TaskPager(self.pool.connect, PAGE_COLUMNS, PAGE_VIEWS[filter_type])
+            API.page_rows(pager, filter_type.upper())
+            return pager.total()
+        return self.show_rows(self.get_rows(filter_type), filter_type)
+
+    def show_rows(self, rows, filter_type)->int:
+        ''' Display rows + a footer. Returns the number shown. '''
         count = 0
         for r in rows:
-            zrow = self.read_row_for_uuid(r['next_task'])
-            if zrow:
-                next_t = zrow['ID']
-            else:
-                next_t = 0
             count += 1
             self.display(r)
-        conn.close()
         API.do_print(f"View [{filter_type.upper()}] is {count:03} of {self.count():03} items.")
         return count
     
@@ -369,6 +401,38 @@ class DoMaster(MenuLoop):
         ''' List pending tasks. '''
         self.list_tasks("pending")
 
+    def list_ordered(self):
+        ''' List pending tasks - blockers first. '''
+        API.do_print(self.short_db_name())
+        conn = self.pool.connect()
+        graph = self.graphs.get(conn)
+        order, stuck = graph.topo_order()
+        rank = {tid: ss for ss, tid in enumerate(order + stuck)}
+        rows = sorted(self.get_rows("pending"),
+                      key=lambda r: rank.get(r['ID'], len(rank)))
+        self.show_rows(rows, "dependency")
+        for loop in graph.cycles():
+            API.do_print(f"Warning: Next Task cycle #{' -> #'.join(map(str, loop))}")
+        path = graph.critical_path()
+        if len(path) > 1:
+            API.do_print(f"Critical path: #{' -> #'.join(map(str, path))}")
+
+    def next_actions(self):
+        ''' List the pending tasks nothing pending blocks - best first. '''
+        count = API.get_int("How many (Default 10): ") or 10
+        API.do_print(self.short_db_name())
+        conn = self.pool.connect()
+        ids = self.scheduler.next(conn, count)
+        rows = []
+        if ids:
+            marks = ', '.join('?' * len(ids))
+            rows = conn.execute(self.get_list_query("all", f"t.ID IN ({marks})"),
+                                ids).fetchall()
+            rank = {tid: ss for ss, tid in enumerate(ids)}
+            rows.sort(key=lambda r: rank[r['ID']])
+        self.show_rows(rows, "next")
+        API.do_print(f"{len(self.scheduler)} tasks are ready to work on.")
+
     def list_done(self):
         ''' List completed tasks. '''
         total = self.list_tasks("done")
@@ -383,19 +447,22 @@ class DoMaster(MenuLoop):
 
     def search_all(self):
         ''' Search all tasks. '''
-        one_word = API.get_input("Enter word: ")
-        if one_word:
-            self.list_tasks(one_word)        
+        words = API.get_input("Enter word(s): ")
+        if not words:
+            return
+        API.do_print(self.short_db_name())
+        rows = search.find(self.pool.connect(), words, API.CALT)
+        self.show_rows(rows, words)
 
     def project_report(self):
         ''' Show all project names. '''
-        conn = sqlite3.connect(self.db_file)
+        conn = self.pool.connect()
         projs = conn.execute("SELECT DISTINCT project_name FROM todo ORDER BY project_name").fetchall()
         for p in projs: API.do_print(f"- {p[0]}")
-        conn.close()
 
     def manage_files(self)->None:
         ''' Manage local files. '''
+        from domaster.manage_files import ManageFiles
         ops = ManageFiles(self)
         ops.mainloop()
 
@@ -407,6 +474,8 @@ def mainloop():
         'Update Task':ops.update_task,
         'Mark Completed':ops.mark_done,
         'List Pendings':ops.list_pending,
+        'List By Dependency':ops.list_ordered,
+        'Next Actions':ops.next_actions,
         'List Done':ops.list_done,
         'List All':ops.list_all,
         'Search':ops.search_all,
@@ -419,6 +488,9 @@ def mainloop():
         print("Going GUI...")
         API.ui_driver.app.mainloop()
     else:
+        from domaster.keeper import Keeps
+        if Keeps.get_option('curses'):
+            API.set_curses()
         API.menu_ops(ops, options, VERSION)
 
 
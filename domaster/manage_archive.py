@@ -18,12 +18,15 @@ if '..' not in sys.path:
 from domaster.ui_loop import API, MenuLoop
 from domaster.sync_tool import SQLiteCSVSync
 from domaster.keeper import Keeps
+from domaster import db_backup
+from domaster.backup_store import BackupStore
 
 class ManageArchived(MenuLoop):
     ''' Single archive to sync same into any archival sweep-path. '''
     def __init__(self, mega):
         super().__init__()
         self.mega = mega
+        self._quarter = -1
 
     def assign_archive(self):
         ''' Set archive location. '''
@@ -51,53 +54,122 @@ class ManageArchived(MenuLoop):
             return yn[0] == 'y'
         return True
 
-    def safe_clone(self, source, archive)->True:
+    def show_progress(self, status, remaining, total):
+        ''' Report each quarter of a page-stepped copy. '''
+        if not total:
+            return
+        done = (total - remaining) * 4 // total
+        if done != self._quarter:
+            self._quarter = done
+            API.do_print(f"Copied {done * 25}% of {total} pages.")
+
+    def safe_clone(self, source, archive, restore=False)->True:
+        ''' Hot-copy via the sqlite3 backup API, then quick_check. '''
         source = source.replace(r'\\','/')
         archive= archive.replace(r'\\','/')
         if not os.path.exists(source):
             API.do_print(f"Error: Unable to stat [{source}].")
             return False
         if self.is_ok(archive):
-            if os.path.exists(archive):
-                os.unlink(archive)
-                if os.path.exists(archive):
-                    API.do_print(f"Error: Unable to delete [{archive}].")
-                    return False
-            shutil.copyfile(source, archive)
-            if not os.path.exists(archive):
+            pages = Keeps.get_option('backup_pages',
+                                     default_value=db_backup.DEFAULT_PAGES)
+            self._quarter = -1
+            if restore:
+                br = db_backup.restore(source, archive, pages, self.show_progress)
+            else:
+                br = db_backup.backup(source, archive, pages, self.show_progress)
+            if not br:
                 API.do_print(f"Error: Unable to create [{archive}].")
                 return False
             API.do_print(f"Success: Created [{archive}].")
             return True
+        return False
 
-    def create_archive(self)->bool:
-        ''' Create database archive. '''
+    def get_store(self)->BackupStore:
+        ''' The backup repository within the archive folder, if any. '''
         folder = Keeps.get_option('backup')
         if not folder:
+            return None
+        return BackupStore(os.sep.join((folder, 'domaster_store')))
+
+    def create_archive(self)->bool:
+        ''' Create database archive. '''
+        store = self.get_store()
+        if not store:
             API.do_print("Error: Please select backup location.")
-            return False        
-        archive = os.sep.join((folder, 'archive.db'))
-        return self.safe_clone(self.mega.db_file, archive)
+            return False
+        pages = Keeps.get_option('backup_pages',
+                                 default_value=db_backup.DEFAULT_PAGES)
+        self._quarter = -1
+        manifest = store.create(self.mega.db_file, pages, self.show_progress)
+        if not manifest:
+            API.do_print(f"Error: Unable to archive [{self.mega.db_file}].")
+            return False
+        API.do_print(f"Success: Archived [{manifest['name']}], "
+                     f"{manifest['added']} of {len(manifest['chunks'])} chunks new.")
+        self.prune_archive()
+        return True
+
+    def prune_archive(self)->None:
+        ''' Apply the archive retention policy. '''
+        store = self.get_store()
+        if not store:
+            API.do_print("Error: Please select backup location.")
+            return
+        removed = store.prune(
+            recent=Keeps.get_option('keep_recent', default_value=5),
+            daily=Keeps.get_option('keep_daily', default_value=7),
+            weekly=Keeps.get_option('keep_weekly', default_value=4),
+            monthly=Keeps.get_option('keep_monthly', default_value=12))
+        chunks = store.gc()
+        if removed or chunks:
+            API.do_print(f"Pruned {len(removed)} archives, {chunks} chunks.")
 
     def restore_archive(self):
         ''' Restore database archive. '''
-        folder = Keeps.get_option('backup')
-        if not folder:
+        store = self.get_store()
+        if not store:
             API.do_print("Please select backup location.")
-            return False        
-        archive = os.sep.join((folder, 'archive.db'))
-        return self.safe_clone(archive, self.mega.db_file)
+            return False
+        names = store.names()
+        legacy = os.sep.join((Keeps.get_option('backup'), 'archive.db'))
+        if os.path.exists(legacy):
+            names.insert(0, legacy) # pre-store single archive
+        if not names:
+            API.do_print("No archives.")
+            return False
+        for ss, name in enumerate(names, 1):
+            API.do_print(f'{ss:02}.) {name}')
+        which = API.get_int("Restore #: ")
+        if not which or which < 1 or which > len(names):
+            API.do_print("Aborted.")
+            return False
+        name = names[which - 1]
+        if name == legacy:
+            if not self.safe_clone(legacy, self.mega.db_file, restore=True):
+                return False
+        else:
+            if not self.is_ok(self.mega.db_file):
+                API.do_print("Aborted.")
+                return False
+            pages = Keeps.get_option('backup_pages',
+                                     default_value=db_backup.DEFAULT_PAGES)
+            self._quarter = -1
+            if not store.restore(name, self.mega.db_file, pages, self.show_progress):
+                API.do_print(f"Error: Unable to restore [{name}].")
+                return False
+            API.do_print(f"Success: Restored [{name}].")
+        self.mega.migrated.discard(self.mega.db_file)
+        self.mega.init_db() # archives may predate the schema
+        return True
 
     def auto_archive(self):
         ''' Toggle automatic archive. '''
-        auto = br = Keeps.get_option('auto_backup')
-        if br:
-            br = Keeps.add_option('auto_backup', False)
-            auto = False
-        else:
-            br = Keeps.add_option('auto_backup', True)
-            auto = True
-        if not br:
+        try:
+            # Read + write under one lock - no lost toggles.
+            with Keeps.batch() as options:
+                auto = options['auto_backup'] = not options.get('auto_backup')
+        except (OSError, TypeError, ValueError):
             API.do_print("Error: Unable to toggle database auto.")
             return
         stat = "On" if auto else "Off"
@@ -111,6 +183,7 @@ class ManageArchived(MenuLoop):
             'Archive Folder':self.assign_archive,
             'Create Archive':self.create_archive,
             'Restore Archive':self.restore_archive,
+            'Prune Archive':self.prune_archive,
             'Auto Archive':self.auto_archive,
             'Quit':API.do_quit
             }
@@ -17,6 +17,7 @@ if '..' not in sys.path:
 from domaster.ui_loop import API, MenuLoop
 from domaster.sync_tool import SQLiteCSVSync
 from domaster.keeper import Keeps
+from domaster import html_report
 
 class ManageFiles(MenuLoop):
 
@@ -36,62 +37,125 @@ class ManageFiles(MenuLoop):
         if self.db.count() == 0:
             API.do_print("Database is empty.")
             return 0
-        conn = sqlite3.connect(self.db.db_file)
-        conn.row_factory = sqlite3.Row
-        query = self.db.get_list_query(status)
-        rows = conn.execute(query).fetchall()
-        if  status == "pending":
-            group_field = 'project_name'
-        else:
-            group_field = 'date_done'
-        count = 0
-        with open(filename, "w") as f:
-            f.write(f"<html><body><h1>DoMaster [{status.upper()}] Report</h1>")
-            current_group = None
-            for r in rows:
-                if r[group_field] != current_group:
-                    current_group = r[group_field]
-                    f.write(f"<h2>{current_group}</h2>")
-                f.write('<hr>')
-                count += 1
-                adict = dict(r)
-                del adict['uuid']
-                for tag in adict:
-                    value = adict[tag]
-                    if tag == 'next_task':
-                        post = self.db.read_row_for_uuid(value)
-                        if post:
-                            value = post['ID']
-                    htag = self.db.humanize(tag)
-                    f.write(f"<b>{htag}:</b>&nbsp;&nbsp;{value}<br>")
+        report = html_report.GroupReport(filename, status)
+        html_report.stream(self.db.pool.connect(), [report])
         API.do_print(f"Report exported to {filename}")
-        conn.close()
-        return count
+        return report.count
+
+    def report_name(self, status)->str:
+        source = 'global' if self.db.is_db_global() else 'local'
+        return f"{source}_report_{status}_{datetime.date.today()}.html"
 
     def export_html(self, status="pending")->int:
         ''' Name + generate the HTML report. Returns number exported. '''
-        source = 'global' if self.db.is_db_global() else 'local'
-        filename = f"{source}_report_{status}_{datetime.date.today()}.html"
-        return self.export_html_file(filename, status)
+        return self.export_html_file(self.report_name(status), status)
 
     def html_report(self):
         ''' Create the HTML Report. '''
         if self.db.count() == 0:
             API.do_print("Database is empty.")
             return
-        total_pending = self.export_html("pending")
-        total_done    = self.export_html("done")
+        # Both reports from a single pass over the table:
+        reports = [html_report.GroupReport(self.report_name(status), status)
+                   for status in ("pending", "done")]
+        html_report.stream(self.db.pool.connect(), reports)
+        for report in reports:
+            API.do_print(f"Report exported to {report.path}")
+        total_pending, total_done = (report.count for report in reports)
         if total_pending == total_done == 0:
             API.do_print("No items exported.")
         else:
             API.do_print(f'Pending: {total_pending:03}, Done: {total_done:03}')
 
+    def html_site(self):
+        ''' A paged HTML report + index - for very large databases. '''
+        if self.db.count() == 0:
+            API.do_print("Database is empty.")
+            return
+        source = 'global' if self.db.is_db_global() else 'local'
+        folder = os.path.join(os.getcwd(), f"{source}_report_site")
+        self.db.pool.connect().commit() # workers read the file
+        stats = html_report.write_site(self.db.db_file, folder)
+        API.do_print(f"Report site updated at {os.path.join(folder, 'index.html')}")
+        API.do_print(f"Pending: {stats['pending']:03}, Done: {stats['done']:03}")
+        API.do_print(f"Pages: {stats['pages']}, Written: {stats['written']}, "
+                     f"Unchanged: {stats['skipped']}, Removed: {stats['removed']}")
+
+    def merge_db(self):
+        ''' Merge the other (GLOBAL / LOCAL) database into this one. '''
+        from domaster import db_merge
+        other = self.db.other_db_file()
+        name = 'LOCAL' if self.db.is_db_global() else 'GLOBAL'
+        if self.db.is_same_db():
+            API.do_print("Both databases are the same file.")
+            return
+        if not os.path.exists(other):
+            API.do_print(f"No {name} database at [{other}].")
+            return
+        yn = API.get_input(f"On conflicts keep (t)his or the {name} task? t/o ").strip().lower()
+        wins = 'this' if yn and yn[0] == 't' else 'other'
+        self.db.pool.connect().commit()
+        try:
+            plan = db_merge.merge(self.db.db_file, other, wins, dry_run=True)
+            API.do_print(f"From {name}: {plan['inserts']} new, {plan['updates']} to update, "
+                         f"{plan['conflicts']} differ, {plan['same']} the same.")
+            if not plan['inserts'] and not plan['updates']:
+                API.do_print("Nothing to merge.")
+                return
+            yn = API.get_input("Merge now? y/n ").strip().lower()
+            if not yn or yn[0] != 'y':
+                API.do_print("Aborted.")
+                return
+            done = db_merge.merge(self.db.db_file, other, wins)
+        except (OSError, ValueError, sqlite3.Error) as ex:
+            API.do_print(f"Error: {ex}")
+            return
+        API.do_print(f"Merged: {done['inserts']} added, {done['updates']} updated.")
+
+    def sync_folder(self):
+        ''' Two-way sync with the databases sharing a folder. '''
+        from domaster import replica_sync
+        folder = Keeps.get_option('sync_folder', default_value=None)
+        prompt = f"Sync folder [{folder}]: " if folder else "Sync folder: "
+        entry = API.get_input(prompt).strip()
+        folder = entry or folder
+        if not folder:
+            API.do_print("Aborted.")
+            return
+        if not os.path.isdir(folder):
+            API.do_print(f"Folder [{folder}] not found.")
+            return
+        self.db.pool.connect().commit()
+        try:
+            stats = replica_sync.sync(self.db.db_file, folder)
+            Keeps.add_option('sync_folder', folder)
+        except (OSError, ValueError, sqlite3.Error) as ex:
+            API.do_print(f"Error: {ex}")
+            return
+        API.do_print(f"Peers: {stats['peers']}, Received: {stats['received']}, Deleted: {stats['deleted']}")
+        API.do_print(f"Sent: {stats['sent']} changes, {stats['sent_deletes']} deletes.")
+        if stats['gaps']:
+            API.do_print(f"Note: {stats['gaps']} peer(s) will re-send at their next sync.")
+        if stats['forgotten']:
+            API.do_print(f"Note: Forgot {stats['forgotten']} peer(s) silent for {replica_sync.STALE_DAYS} days.")
+
+    def full_screen(self):
+        ''' Toggle the full-screen text UI (next start.) '''
+        try:
+            with Keeps.batch() as options:
+                mode = options['curses'] = not options.get('curses')
+        except (OSError, TypeError, ValueError):
+            API.do_print("Error: Unable to toggle the screen mode.")
+            return
+        stat = "On" if mode else "Off"
+        API.do_print(f"Full-screen text UI is now [{stat}] - from the next start.")
+
     def export_csv(self, dated=False, folder=None)->bool:
         ''' Export to CSV file. '''
         if self.db.count() == 0:
             API.do_print("Database is empty.")
             return False
-        mgr = SQLiteCSVSync(self.db.db_file, 'todo', self)
+        mgr = SQLiteCSVSync(self.db.db_file, 'todo', self, self.db.pool)
         zfile = 'domaster.csv'
         safe = self.db.get_now().replace(':','-').replace(' ','@')
         if os.path.exists(zfile):
@@ -120,11 +184,14 @@ class ManageFiles(MenuLoop):
 
     def import_csv(self, file_name=None)->bool:
         ''' Import CSV file into the database. '''
-        mgr = SQLiteCSVSync(self.db.db_file, 'todo', self)
+        mgr = SQLiteCSVSync(self.db.db_file, 'todo', self, self.db.pool)
         zfile = 'domaster.csv'
         if file_name:
             zfile = file_name
         br = mgr.import_from_csv(zfile)
+        if br == -1:
+            API.do_print("Aborted.")
+            return False
         if not br:
             API.do_print(f"Error: Unable to import {zfile} file.")
         else:
@@ -147,15 +214,14 @@ class ManageFiles(MenuLoop):
                 folder = None
         if not self.export_csv(True, folder=folder):
             return
-        conn = sqlite3.connect(self.db.db_file)
+        conn = self.db.pool.connect()
         try:
             conn.execute("DELETE FROM todo WHERE ID IS NOT 0;")
             conn.commit()
             API.do_print("Success: All tasks removed.")
         except Exception as ex:
+            conn.rollback()
             API.do_print(f"Error: Unable to reset {self.db.db_file}.")
-        finally:
-            conn.close()
 
     def get_artis(self)->list:
         ''' List the arifacts, if any. '''
@@ -219,12 +285,16 @@ class ManageFiles(MenuLoop):
     def mainloop(self)->None:
         options = {
             'HTML Report':self.html_report,
+            'HTML Site':self.html_site,
             'Archive':self.archive_options,
             'Export Data':self.export_csv,
             'Import Data':self.import_csv,
             'Reset Database':self.backup_and_empty,
             'Copy Data':self.copy_data,
+            'Merge Db':self.merge_db,
+            'Sync Folder':self.sync_folder,
             'Cleanup':self.remove_temp_files,
+            'Full Screen':self.full_screen,
             'Quit':API.do_quit
             }
         API.menu_ops(self, options, "File Manager")
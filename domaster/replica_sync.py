@@ -0,0 +1,441 @@
+# MISSION: Two-way sync between DoMaster databases over a shared folder.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: Each database (replica) drops its changes into the folder as
+# <replica>.dmsync - a small SQLite file - and applies everyone else's.
+# Only the rows past a peer's checkpoint are read or written.
+# DATE: 2026-10-18 21:02:17
+# FILE: replica_sync.py
+# AUTHOR: Randall Nagy
+#
+''' One sync() both applies the peers' change files + writes our own:
+
+    * A change file holds the rows & tombstones changed since the
+      oldest change any known peer has yet to read (acks), together
+      with how far this replica has read each peer (got.)
+    * A conflict goes to the later date_modified (UTC.) On a tie the
+      delete wins; else the greater content does - every replica
+      picks the same row.
+    * A change file that begins past what we last read (a gap) is
+      applied, yet not acknowledged - the peer then re-sends it all.
+    * A peer silent for STALE_DAYS is forgotten, so it no longer
+      holds back what we send. Tombstones every remaining peer has
+      read - older than that, too - are purged. (A replica away for
+      longer may bring back tasks deleted meanwhile.)
+    * A copy of a database - another file, or an older self restored
+      over it - takes a new id (see claim.) Else two replicas would
+      share one change file.
+'''
+import os, sys
+import uuid
+import sqlite3
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster import schema
+from domaster.db_merge import shared_columns
+from domaster.db_pool import read_only
+
+FORMAT = 2          # change file version
+SUFFIX = '.dmsync'  # change file extension
+STAMP_COLUMNS = ('uuid', 'date_modified') # never compared as content
+STALE_DAYS = 30     # a peer silent this long is forgotten
+
+def replica_id(conn)->str:
+    ''' This database's id in the sync folder. '''
+    return conn.execute("SELECT replica FROM sync_replica WHERE id = 1").fetchone()[0]
+
+def drop_file(folder, replica)->str:
+    return os.path.join(folder, replica + SUFFIX)
+
+def drop_token(path):
+    ''' The token a change file was written with - None if unreadable. '''
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(read_only(path), uri=True)
+        try:
+            return conn.execute("SELECT token FROM meta").fetchone()[0]
+        finally:
+            conn.close()
+    except (sqlite3.Error, TypeError):
+        return None
+
+def claim(conn, db_file, folder)->str:
+    ''' This database's id - a new one for a copy. A copy either lives
+        in another file, or finds our change file written by someone
+        else (the original, when an older copy was restored over it.)
+        A new id has every peer read it again, from the start.
+    '''
+    here = os.path.realpath(db_file)
+    me, home = conn.execute("SELECT replica, db_file FROM sync_replica WHERE id = 1").fetchone()
+    row = conn.execute("SELECT token, next_token FROM sync_drop WHERE folder = ?",
+                       (os.path.realpath(folder),)).fetchone()
+    theirs = drop_token(drop_file(folder, me))
+    copied = (home is not None and home != here) or \
+             (theirs is not None and theirs not in (row or ()))
+    if home == here and not copied:
+        return me
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if copied:
+            conn.execute("UPDATE sync_replica SET replica = lower(hex(randomblob(16))) WHERE id = 1")
+            conn.execute("UPDATE sync_peer SET acked_seq = 0")
+            conn.execute("DELETE FROM sync_drop")
+        conn.execute("UPDATE sync_replica SET db_file = ? WHERE id = 1", (here,))
+        conn.commit()
+    except:
+        conn.rollback()
+        raise
+    return replica_id(conn)
+
+def _content(alias, cols)->str:
+    ''' A row's values as one comparable string - the tie-break. '''
+    return " || char(31) || ".join(f"quote({alias}.{name})" for name in cols
+                                   if name not in STAMP_COLUMNS) or "''"
+
+def _stamp(expr)->str:
+    return f"IFNULL({expr}, '')"
+
+def cutoff(conn, days=STALE_DAYS)->str:
+    ''' The UTC time a peer (or tombstone) is stale before. '''
+    return conn.execute(f"SELECT strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+                        (f"-{int(days)} days",)).fetchone()[0]
+
+def read_drop(conn, path, me, stale='')->dict:
+    ''' Apply one peer's change file - unless written before stale.
+        Returns what it did.
+    '''
+    conn.execute("ATTACH DATABASE ? AS other", (read_only(path),))
+    try:
+        meta = conn.execute("SELECT replica, format, base, seq, date_written FROM other.meta").fetchone()
+        if not meta or meta[1] != FORMAT:
+            raise ValueError(f"{path} is not a DoMaster change file.")
+        peer, _, base, seq, written = meta
+        result = {'peer': peer, 'received': 0, 'deleted': 0, 'gap': False,
+                  'stale': (written or '') < stale}
+        if peer == me:
+            return result
+        if result['stale']:
+            conn.execute("DELETE FROM sync_peer WHERE replica = ?", (peer,))
+            conn.commit()
+            return result
+        row = conn.execute("SELECT seq FROM other.acks WHERE replica = ?", (me,)).fetchone()
+        acked = row[0] if row else 0
+        row = conn.execute("SELECT got_seq FROM sync_peer WHERE replica = ?", (peer,)).fetchone()
+        got = row[0] if row else 0
+        result['gap'] = base > got
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if seq > got:
+                result.update(_apply(conn, got))
+            if not result['gap']:
+                got = max(got, seq)
+            conn.execute(
+                """INSERT INTO sync_peer (replica, got_seq, acked_seq, date_synced)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(replica) DO UPDATE SET got_seq = excluded.got_seq,
+                        acked_seq = excluded.acked_seq, date_synced = excluded.date_synced""",
+                (peer, got, acked, written))
+            conn.commit()
+        except:
+            conn.rollback()
+            raise
+        return result
+    finally:
+        conn.execute("DETACH DATABASE other")
+
+def _apply(conn, got)->dict:
+    ''' Settle the attached change file's rows past got with ours. '''
+    cols = shared_columns(conn)
+    names = ', '.join(cols)
+    conn.execute("DROP TABLE IF EXISTS temp.sync_rows")
+    conn.execute("DROP TABLE IF EXISTS temp.sync_gone")
+    # Decide both sets before changing either:
+    conn.execute(
+        f"""CREATE TEMP TABLE sync_rows AS SELECT {', '.join(f"o.{name}" for name in cols)}
+            FROM other.todo o
+            LEFT JOIN main.todo m ON m.uuid = o.uuid
+            LEFT JOIN main.todo_tombstone d ON d.uuid = o.uuid
+            WHERE o.seq > ? AND o.uuid IS NOT NULL AND CASE
+                WHEN m.uuid IS NULL THEN
+                    d.uuid IS NULL OR {_stamp('o.date_modified')} > {_stamp('d.date_deleted')}
+                WHEN {_stamp('o.date_modified')} != {_stamp('m.date_modified')} THEN
+                    {_stamp('o.date_modified')} > {_stamp('m.date_modified')}
+                ELSE {_content('o', cols)} > {_content('m', cols)} END
+            ORDER BY o.seq""", (got,))
+    conn.execute(
+        f"""CREATE TEMP TABLE sync_gone AS SELECT o.uuid, o.date_deleted
+            FROM other.tombstone o
+            LEFT JOIN main.todo m ON m.uuid = o.uuid
+            LEFT JOIN main.todo_tombstone d ON d.uuid = o.uuid
+            WHERE o.seq > ? AND CASE WHEN m.uuid IS NULL THEN d.uuid IS NULL
+                ELSE {_stamp('o.date_deleted')} >= {_stamp('m.date_modified')} END""", (got,))
+    try:
+        received = conn.execute("SELECT COUNT(*) FROM temp.sync_rows").fetchone()[0]
+        if received:
+            # Both sides take their own change_seq, so the triggers keep
+            # the peer's date_modified - even when it equals ours:
+            seq = "(SELECT seq + 1 FROM main.todo_seq WHERE id = 1)"
+            picks = ', '.join(f"IFNULL(date_modified, {schema.NOW})" if name == 'date_modified'
+                              else name for name in cols)
+            changing = ', '.join([f"{name} = excluded.{name}" for name in cols if name != 'uuid'] +
+                                 [f"change_seq = {seq}"])
+            conn.execute(
+                f"""INSERT INTO main.todo ({names}, change_seq) SELECT {picks}, {seq}
+                    FROM temp.sync_rows WHERE 1
+                    ON CONFLICT(uuid) DO UPDATE SET {changing}""")
+            conn.execute("UPDATE main.todo_seq SET seq = seq + 1 WHERE id = 1")
+        deleted = conn.execute("SELECT COUNT(*) FROM temp.sync_gone").fetchone()[0]
+        if deleted:
+            conn.execute("DELETE FROM main.todo WHERE uuid IN (SELECT uuid FROM temp.sync_gone)")
+            # Keep the peer's date, so the next replica settles the same way:
+            conn.execute(
+                """INSERT INTO main.todo_tombstone (uuid, date_deleted, change_seq)
+                   SELECT uuid, date_deleted, (SELECT seq + 1 FROM main.todo_seq WHERE id = 1)
+                   FROM temp.sync_gone WHERE 1
+                   ON CONFLICT(uuid) DO UPDATE SET date_deleted = excluded.date_deleted,
+                       change_seq = excluded.change_seq""")
+            conn.execute("UPDATE main.todo_seq SET seq = seq + 1 WHERE id = 1")
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.sync_rows")
+        conn.execute("DROP TABLE IF EXISTS temp.sync_gone")
+    return {'received': received, 'deleted': deleted}
+
+def write_drop(conn, folder, me)->dict:
+    ''' Replace our change file: everything a known peer has yet to read. '''
+    base = conn.execute("SELECT MIN(acked_seq) FROM sync_peer").fetchone()[0] or 0
+    token = uuid.uuid4().hex
+    where = os.path.realpath(folder)
+    path = drop_file(folder, me)
+    work = path + '.tmp'
+    if os.path.exists(work):
+        os.remove(work)
+    try:
+        sent, sent_deletes, seq = _build_drop(conn, work, where, me, base, token)
+        os.replace(work, path)
+    except:
+        if os.path.exists(work):
+            os.remove(work)
+        raise
+    # Only now is token the one on disk:
+    conn.execute("UPDATE sync_drop SET token = next_token, next_token = NULL WHERE folder = ?", (where,))
+    conn.commit()
+    return {'sent': sent, 'sent_deletes': sent_deletes, 'base': base, 'seq': seq}
+
+def _build_drop(conn, work, where, me, base, token)->tuple:
+    ''' Write the change file to work. Returns (sent, sent_deletes, seq) '''
+    conn.execute("ATTACH DATABASE ? AS other", (work,))
+    try:
+        cols = [name for name in (info[1] for info in conn.execute("PRAGMA main.table_info(todo)"))
+                if name not in schema.LOCAL_COLUMNS]
+        conn.execute("BEGIN") # one snapshot
+        try:
+            seq = schema.current_seq(conn)
+            conn.execute("""CREATE TABLE other.meta (replica TEXT, format INTEGER, base INTEGER,
+                            seq INTEGER, token TEXT, date_written TEXT)""")
+            conn.execute(f"INSERT INTO other.meta VALUES (?, ?, ?, ?, ?, {schema.NOW})",
+                         (me, FORMAT, base, seq, token))
+            # (claim() takes either token until the file is replaced.)
+            conn.execute("""INSERT INTO main.sync_drop (folder, next_token) VALUES (?, ?)
+                            ON CONFLICT(folder) DO UPDATE SET next_token = excluded.next_token""",
+                         (where, token))
+            conn.execute("CREATE TABLE other.acks AS SELECT replica, got_seq AS seq FROM main.sync_peer")
+            conn.execute(f"""CREATE TABLE other.todo AS SELECT {', '.join(cols)}, change_seq AS seq
+                             FROM main.todo WHERE change_seq > ? ORDER BY change_seq""", (base,))
+            conn.execute("""CREATE TABLE other.tombstone AS SELECT uuid, date_deleted, change_seq AS seq
+                            FROM main.todo_tombstone WHERE change_seq > ? ORDER BY change_seq""", (base,))
+            sent = conn.execute("SELECT COUNT(*) FROM other.todo").fetchone()[0]
+            sent_deletes = conn.execute("SELECT COUNT(*) FROM other.tombstone").fetchone()[0]
+            conn.commit()
+        except:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute("DETACH DATABASE other")
+    return sent, sent_deletes, seq
+
+def forget(conn, stale)->dict:
+    ''' Drop the peers silent since before stale (date_synced is when
+        the peer last wrote), then the tombstones - as old - that all
+        the others have read.
+    '''
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        peers = conn.execute("DELETE FROM sync_peer WHERE IFNULL(date_synced, '') < ?",
+                             (stale,)).rowcount
+        base = conn.execute("SELECT MIN(acked_seq) FROM sync_peer").fetchone()[0] or 0
+        purged = conn.execute(
+            """DELETE FROM todo_tombstone
+               WHERE change_seq <= ? AND IFNULL(date_deleted, '') < ?""", (base, stale)).rowcount
+        conn.commit()
+    except:
+        conn.rollback()
+        raise
+    return {'forgotten': peers, 'purged': purged}
+
+def sync(db_file, folder, stale_days=STALE_DAYS)->dict:
+    ''' Apply every peer's change file in folder, then write ours.
+        Returns {'peers', 'received', 'deleted', 'gaps', 'stale',
+                 'sent', 'sent_deletes', 'forgotten', 'purged', ...}
+    '''
+    if not os.path.isdir(folder):
+        raise FileNotFoundError(f"Sync folder '{folder}' not found.")
+    conn = sqlite3.connect(db_file, uri=True)
+    try:
+        schema.migrate(conn)
+        me = claim(conn, db_file, folder)
+        stale = cutoff(conn, stale_days)
+        result = {'replica': me, 'peers': 0, 'received': 0, 'deleted': 0, 'gaps': 0, 'stale': 0}
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(SUFFIX) or name == me + SUFFIX:
+                continue
+            done = read_drop(conn, os.path.join(folder, name), me, stale)
+            result['peers'] += not done['stale']
+            result['stale'] += done['stale']
+            result['received'] += done['received']
+            result['deleted'] += done['deleted']
+            result['gaps'] += done['gap']
+        result.update(forget(conn, stale))
+        result.update(write_drop(conn, folder, me))
+    finally:
+        conn.close()
+    return result
+
+
+if __name__ == '__main__':
+    import time, tempfile
+    zdir = tempfile.mkdtemp()
+    drop = os.path.join(zdir, 'drop')
+    os.mkdir(drop)
+    dbs = [os.path.join(zdir, f'{name}.db') for name in 'abc']
+    for db_file in dbs:
+        conn = sqlite3.connect(db_file)
+        schema.migrate(conn)
+        conn.close()
+
+    def edit(db_file, *statements):
+        conn = sqlite3.connect(db_file)
+        for sql in statements:
+            conn.execute(sql)
+        conn.commit()
+        conn.close()
+
+    def rows(db_file)->set:
+        conn = sqlite3.connect(db_file)
+        found = set(conn.execute("SELECT uuid, task_description, date_modified FROM todo"))
+        conn.close()
+        return found
+
+    def everyone():
+        for _ in range(2): # until each has read the others
+            for db_file in dbs:
+                sync(db_file, drop)
+
+    edit(dbs[0], "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 20000)"
+                 " INSERT INTO todo (uuid, task_description, date_modified)"
+                 " SELECT 'a' || x, 'task ' || x, '2026-01-01 00:00:00.000' FROM n")
+    edit(dbs[1], "INSERT INTO todo (uuid, task_description) VALUES ('b1', 'from b')")
+    everyone()
+    if not (rows(dbs[0]) == rows(dbs[1]) == rows(dbs[2])) or len(rows(dbs[2])) != 20001:
+        print("Error 010: initial sync failure.")
+        sys.exit(10)
+    # Conflicts: the later edit wins; a tie goes to the greater content.
+    edit(dbs[0], "UPDATE todo SET task_description = 'old', date_modified = '2026-02-01 00:00:00.000' WHERE uuid = 'a1'",
+                 "UPDATE todo SET task_description = 'x', date_modified = '2026-03-01 00:00:00.000' WHERE uuid = 'a2'",
+                 "DELETE FROM todo WHERE uuid = 'a3'")
+    edit(dbs[1], "UPDATE todo SET task_description = 'new', date_modified = '2026-02-02 00:00:00.000' WHERE uuid = 'a1'",
+                 "UPDATE todo SET task_description = 'y', date_modified = '2026-03-01 00:00:00.000' WHERE uuid = 'a2'")
+    edit(dbs[2], "DELETE FROM todo WHERE uuid = 'b1'")
+    everyone()
+    found = [rows(db_file) for db_file in dbs]
+    text = {uuid_: desc for uuid_, desc, _ in found[0]}
+    if not (found[0] == found[1] == found[2]):
+        print("Error 020: convergence failure.")
+        sys.exit(20)
+    if text.get('a1') != 'new' or text.get('a2') != "y" or 'a3' in text or 'b1' in text:
+        print("Error 030: conflict failure.", text.get('a1'), text.get('a2'))
+        sys.exit(30)
+    if ('a2', 'y', '2026-03-01 00:00:00.000') not in found[0]:
+        print("Error 035: tie restamped.")
+        sys.exit(35)
+    # Steady state: only the changes travel.
+    edit(dbs[2], "UPDATE todo SET task_description = 'z' WHERE uuid = 'a9'")
+    began = time.perf_counter()
+    done = sync(dbs[2], drop)
+    took = time.perf_counter() - began
+    if done['sent'] >= 100:
+        print("Error 040: delta failure.", done)
+        sys.exit(40)
+    everyone()
+    if any(('a9', 'z') not in {(u, d) for u, d, _ in rows(db_file)} for db_file in dbs):
+        print("Error 050: update failure.")
+        sys.exit(50)
+    # A copy of a database syncs as a replica of its own:
+    import shutil
+    dbs.append(os.path.join(zdir, 'd.db'))
+    shutil.copyfile(dbs[0], dbs[3])
+    edit(dbs[0], "UPDATE todo SET task_description = 'from a' WHERE uuid = 'a10'")
+    edit(dbs[3], "UPDATE todo SET task_description = 'from d' WHERE uuid = 'a11'")
+    everyone()
+    for db_file in dbs:
+        text = {uuid_: desc for uuid_, desc, _ in rows(db_file)}
+        if (text['a10'], text['a11']) != ('from a', 'from d'):
+            print("Error 060: copy failure.", db_file)
+            sys.exit(60)
+    if len([name for name in os.listdir(drop) if name.endswith(SUFFIX)]) != 4:
+        print("Error 070: shared change file.")
+        sys.exit(70)
+    # A change file that fails to land costs neither the id nor the acks:
+    conn = sqlite3.connect(dbs[1])
+    me = conn.execute("SELECT replica FROM sync_replica").fetchone()[0]
+    conn.close()
+    replace = os.replace
+    def refuse(*args):
+        os.replace = replace
+        raise PermissionError(args[1])
+    os.replace = refuse
+    try:
+        sync(dbs[1], drop)
+        print("Error 075: replace failure unnoticed.")
+        sys.exit(75)
+    except PermissionError:
+        pass
+    edit(dbs[1], "UPDATE todo SET task_description = 'again' WHERE uuid = 'a13'")
+    done = sync(dbs[1], drop)
+    conn = sqlite3.connect(dbs[1])
+    still = conn.execute("SELECT replica FROM sync_replica").fetchone()[0]
+    conn.close()
+    if still != me or done['sent'] >= 100 or \
+       [name for name in os.listdir(drop) if not name.endswith(SUFFIX)]:
+        print("Error 076: failed replace failure.", done)
+        sys.exit(76)
+    everyone()
+    # A peer gone quiet stops holding the others back:
+    quiet = dbs.pop()
+    edit(quiet, f"UPDATE sync_replica SET replica = 'quiet'")
+    sync(quiet, drop)
+    edit(dbs[0], "DELETE FROM todo WHERE uuid = 'a12'",
+                 "UPDATE todo_tombstone SET date_deleted = '2001-01-01 00:00:00.000'")
+    everyone()
+    conn = sqlite3.connect(drop_file(drop, 'quiet'))
+    conn.execute("UPDATE meta SET date_written = '2001-01-01 00:00:00.000'")
+    conn.commit()
+    conn.close()
+    for db_file in dbs:
+        done = sync(db_file, drop)
+    conn = sqlite3.connect(dbs[-1])
+    peers = conn.execute("SELECT COUNT(*) FROM sync_peer WHERE replica = 'quiet'").fetchone()[0]
+    conn.close()
+    if done['stale'] != 1 or peers or done['base'] != done['seq'] or done['sent']:
+        print("Error 080: stale peer failure.", done, peers)
+        sys.exit(80)
+    everyone()
+    conn = sqlite3.connect(dbs[0])
+    left = conn.execute("SELECT COUNT(*) FROM todo_tombstone").fetchone()[0]
+    conn.close()
+    if left != 0:
+        print("Error 090: tombstone purge failure.", left)
+        sys.exit(90)
+    print(f"Synced a change in {took * 1000:.1f}ms.")
+    print("Testing Success!")
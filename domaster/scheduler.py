@@ -0,0 +1,190 @@
+# MISSION: What can be worked on next?
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: A heap of the pending tasks that nothing pending blocks,
+# kept current by hooks rather than by re-reading the table.
+# DATE: 2026-10-18 15:22:16
+# FILE: scheduler.py
+# AUTHOR: Randall Nagy
+#
+import sys
+import heapq
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster.db_pool import data_stamp
+
+COLUMNS = "ID, uuid, next_task, date_done, task_priority, date_created"
+
+class Scheduler:
+    '''
+Actionable tasks - pending, with every blocker done - ordered
+by task_priority (lowest first, blanks last), then age.
+
+Writers call check(conn) before changing the todo table on conn,
+then on_add / on_update / on_done / on_delete(conn, tid) after the
+commit. Any other change - another connection, an import - is
+spotted by data_stamp() and answered with a rebuild.
+'''
+    def __init__(self):
+        self.stamp = None   # None: not built, or stale
+        self.nodes = {}     # ID -> (uuid, next_task, done, key)
+        self.by_uuid = {}   # uuid -> ID
+        self.blockers = {}  # uuid -> number of pending tasks ahead
+        self.ready = {}     # ID -> heap key, for the valid entries
+        self.heap = []      # (key, ID) - may hold stale entries
+
+    @staticmethod
+    def make_key(pri, created, tid)->tuple:
+        ''' Heap order: priority, then date created, then ID. '''
+        try:
+            pri = (0, float(pri))
+        except (TypeError, ValueError):
+            pri = (1, 0.0) # blank / text: last
+        return pri + (created or '', tid)
+
+    def reset(self):
+        ''' Forget everything - rebuilt when next needed. '''
+        self.__init__()
+
+    def check(self, conn):
+        ''' Call before writing: notices changes made elsewhere. '''
+        if self.stamp is not None and data_stamp(conn) != self.stamp:
+            self.stamp = None
+
+    def rebuild(self, conn):
+        self.reset()
+        for row in conn.execute(f"SELECT {COLUMNS} FROM todo"):
+            self._link(row, push=False)
+        self.heap = [(key, tid) for tid, key in self.ready.items()]
+        heapq.heapify(self.heap)
+        self.stamp = data_stamp(conn)
+
+    def _push(self, tid):
+        key = self.nodes[tid][3]
+        self.ready[tid] = key
+        heapq.heappush(self.heap, (key, tid))
+
+    def _link(self, row, push=True):
+        tid, uuid, nxt, done, pri, created = row # COLUMNS order
+        done = bool(done)
+        nxt = nxt or None
+        self.nodes[tid] = (uuid, nxt, done, self.make_key(pri, created, tid))
+        self.by_uuid[uuid] = tid
+        if done:
+            return
+        if nxt:
+            count = self.blockers.get(nxt, 0) + 1
+            self.blockers[nxt] = count
+            if count == 1:
+                for other, node in self._with_uuid(nxt):
+                    self.ready.pop(other, None) # now blocked
+        if not self.blockers.get(uuid):
+            if push:
+                self._push(tid)
+            else:
+                self.ready[tid] = self.nodes[tid][3]
+
+    def _unlink(self, tid):
+        node = self.nodes.pop(tid, None)
+        if not node:
+            return
+        self.ready.pop(tid, None)
+        uuid, nxt, done = node[:3]
+        if self.by_uuid.get(uuid) == tid:
+            del self.by_uuid[uuid]
+        if done or not nxt:
+            return
+        count = self.blockers.get(nxt, 0) - 1
+        if count > 0:
+            self.blockers[nxt] = count
+            return
+        self.blockers.pop(nxt, None)
+        for other, node in self._with_uuid(nxt):
+            if not node[2] and other not in self.ready:
+                self._push(other) # unblocked
+
+    def _with_uuid(self, uuid):
+        ''' Tasks sharing a uuid - usually exactly one. '''
+        tid = self.by_uuid.get(uuid)
+        if tid is not None:
+            return [(tid, self.nodes[tid])]
+        return []
+
+    def on_update(self, conn, tid):
+        ''' Task tid was added, changed, completed or removed on conn. '''
+        if self.stamp is None:
+            return # not built - nothing to keep current
+        row = conn.execute(f"SELECT {COLUMNS} FROM todo WHERE ID = ?", (tid,)).fetchone()
+        self._unlink(tid)
+        if row:
+            self._link(row)
+        self.stamp = data_stamp(conn)
+        if len(self.heap) > 2 * len(self.ready) + 64:
+            self.heap = [(key, tid) for tid, key in self.ready.items()]
+            heapq.heapify(self.heap) # shed the stale entries
+
+    on_add = on_update
+    on_done = on_update
+    on_delete = on_update
+
+    def next(self, conn, count=10)->list:
+        ''' The IDs of the next count actionable tasks, best first. '''
+        if self.stamp is None or data_stamp(conn) != self.stamp:
+            self.rebuild(conn)
+        taken = []
+        while self.heap and len(taken) < count:
+            key, tid = heapq.heappop(self.heap)
+            if self.ready.get(tid) == key and tid not in taken:
+                taken.append(tid)
+        for tid in taken:
+            heapq.heappush(self.heap, (self.ready[tid], tid))
+        return taken
+
+    def __len__(self):
+        return len(self.ready)
+
+
+if __name__ == '__main__':
+    import sqlite3
+    from domaster import schema
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    schema.migrate(conn)
+    # 1 blocks 2 blocks 3; 4 & 5 are free.
+    for tid, nxt, pri in ((1, 'u2', 3), (2, 'u3', 1), (3, 0, 1), (4, 0, 2), (5, 0, '')):
+        conn.execute("INSERT INTO todo (ID, uuid, next_task, task_priority, date_created)"
+                     " VALUES (?, ?, ?, ?, ?)", (tid, f'u{tid}', nxt, pri, f'2026-01-0{tid}'))
+    conn.commit()
+    sched = Scheduler()
+    if sched.next(conn, 10) != [4, 1, 5]:
+        print("Error 010: initial order failure.")
+        sys.exit(10)
+    sched.check(conn)
+    conn.execute("UPDATE todo SET date_done = 'x' WHERE ID = 1")
+    conn.commit()
+    sched.on_done(conn, 1)
+    if sched.next(conn, 2) != [2, 4]:
+        print("Error 020: unblock failure.")
+        sys.exit(20)
+    sched.check(conn)
+    conn.execute("INSERT INTO todo (ID, uuid, next_task, task_priority) VALUES (6, 'u6', 'u4', 0)")
+    conn.commit()
+    sched.on_add(conn, 6)
+    if sched.next(conn, 10) != [6, 2, 5]:
+        print("Error 030: add / block failure.")
+        sys.exit(30)
+    sched.check(conn)
+    conn.execute("DELETE FROM todo WHERE ID = 6")
+    conn.commit()
+    sched.on_delete(conn, 6)
+    stamp = sched.stamp
+    if sched.next(conn, 10) != [2, 4, 5] or sched.stamp is not stamp:
+        print("Error 040: delete / incremental failure.")
+        sys.exit(40)
+    conn.execute("UPDATE todo SET task_priority = 9 WHERE ID = 2") # unhooked
+    conn.commit()
+    if sched.next(conn, 1) != [4]:
+        print("Error 050: outside change failure.")
+        sys.exit(50)
+    print("Testing Success!")
@@ -0,0 +1,254 @@
+# MISSION: Versioned schema upgrades for DoMaster databases.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: Driven by PRAGMA user_version. Append - never edit - steps.
+# DATE: 2026-10-18 09:40:11
+# FILE: schema.py
+# AUTHOR: Randall Nagy
+#
+import sqlite3
+
+# Columns that belong to one database - never copied to another:
+LOCAL_COLUMNS = ('ID', 'change_seq')
+
+# When a row last changed: UTC, to the millisecond.
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+def has_fts5(conn)->bool:
+    ''' See if this SQLite was built with FTS5. '''
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(a)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def _add_fts(conn):
+    ''' Full-text index over todo, kept current by triggers. '''
+    if not has_fts5(conn):
+        return # search.py falls back to LIKE
+    for statement in (
+        """CREATE VIRTUAL TABLE IF NOT EXISTS todo_fts USING fts5(
+            project_name, task_description,
+            content='todo', content_rowid='ID',
+            tokenize='unicode61 remove_diacritics 2')""",
+        """CREATE TRIGGER IF NOT EXISTS todo_fts_ai AFTER INSERT ON todo BEGIN
+            INSERT INTO todo_fts(rowid, project_name, task_description)
+                VALUES (new.ID, new.project_name, new.task_description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS todo_fts_ad AFTER DELETE ON todo BEGIN
+            INSERT INTO todo_fts(todo_fts, rowid, project_name, task_description)
+                VALUES ('delete', old.ID, old.project_name, old.task_description);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS todo_fts_au
+            AFTER UPDATE OF project_name, task_description ON todo BEGIN
+            INSERT INTO todo_fts(todo_fts, rowid, project_name, task_description)
+                VALUES ('delete', old.ID, old.project_name, old.task_description);
+            INSERT INTO todo_fts(rowid, project_name, task_description)
+                VALUES (new.ID, new.project_name, new.task_description);
+        END""",
+        "INSERT INTO todo_fts(todo_fts) VALUES ('rebuild')",
+        ):
+        conn.execute(statement)
+
+def _rebuild_fts(conn):
+    ''' Re-index todo_fts from todo, when there is one. '''
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'todo_fts'").fetchone():
+        conn.execute("INSERT INTO todo_fts(todo_fts) VALUES ('rebuild')")
+
+def current_seq(conn)->int:
+    ''' The latest change_seq handed out - 0 before version 5. '''
+    try:
+        row = conn.execute("SELECT seq FROM todo_seq WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] if row else 0
+
+# Each step's statements upgrade the database to version (index + 1).
+# Callables are handed the connection, instead.
+MIGRATIONS = [
+    # 1: The original table.
+    ("""
+    CREATE TABLE IF NOT EXISTS todo (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        uuid TEXT UNIQUE,
+        project_name TEXT,
+        date_created TEXT,
+        date_done TEXT,
+        task_description TEXT,
+        task_priority INTEGER,
+        next_task TEXT
+    )
+    """,),
+    # 2: List, report & dependency lookups.
+    # (uuid is already indexed by its UNIQUE constraint.)
+    ("""CREATE INDEX IF NOT EXISTS idx_todo_order
+        ON todo(project_name, task_priority, date_created)""",
+     """CREATE INDEX IF NOT EXISTS idx_todo_pending
+        ON todo(project_name, task_priority, date_created)
+        WHERE date_done IS NULL OR date_done = ''""",
+     """CREATE INDEX IF NOT EXISTS idx_todo_done
+        ON todo(project_name, task_priority, date_created)
+        WHERE date_done IS NOT NULL AND date_done != ''""",
+     """CREATE INDEX IF NOT EXISTS idx_todo_date_done
+        ON todo(date_done)""",
+     """CREATE INDEX IF NOT EXISTS idx_todo_next_task
+        ON todo(next_task)""",
+     "ANALYZE",
+     ),
+    # 3: Full-text search.
+    (_add_fts,),
+    # 4: Keyset paging in view order (see task_pager.py.)
+    ("""CREATE INDEX IF NOT EXISTS idx_todo_view
+        ON todo(IFNULL(project_name, ''), IFNULL(task_priority, ''), ID)""",
+     ),
+    # 5: Change tracking. Every insert / update takes the next
+    # change_seq (todo_seq) + a date_modified; a delete leaves a
+    # tombstone. Existing rows are numbered by ID, modified unknown.
+    ("ALTER TABLE todo ADD COLUMN date_modified TEXT",
+     "ALTER TABLE todo ADD COLUMN change_seq INTEGER",
+     """CREATE TABLE IF NOT EXISTS todo_seq (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        seq INTEGER NOT NULL)""",
+     """CREATE TABLE IF NOT EXISTS todo_tombstone (
+        uuid TEXT PRIMARY KEY,
+        date_deleted TEXT,
+        change_seq INTEGER)""",
+     "UPDATE todo SET change_seq = ID",
+     "INSERT OR REPLACE INTO todo_seq (id, seq) SELECT 1, IFNULL(MAX(ID), 0) FROM todo",
+     "CREATE INDEX IF NOT EXISTS idx_todo_change_seq ON todo(change_seq)",
+     "CREATE INDEX IF NOT EXISTS idx_tombstone_seq ON todo_tombstone(change_seq)",
+     f"""CREATE TRIGGER IF NOT EXISTS todo_seq_ai AFTER INSERT ON todo BEGIN
+            UPDATE todo_seq SET seq = seq + 1 WHERE id = 1;
+            UPDATE todo SET change_seq = (SELECT seq FROM todo_seq WHERE id = 1),
+                date_modified = IFNULL(NEW.date_modified, {NOW})
+                WHERE ID = NEW.ID;
+            DELETE FROM todo_tombstone WHERE uuid = NEW.uuid;
+        END""",
+     # (Writers that set change_seq themselves - the triggers - are skipped.)
+     f"""CREATE TRIGGER IF NOT EXISTS todo_seq_au AFTER UPDATE ON todo
+        WHEN NEW.change_seq IS OLD.change_seq BEGIN
+            UPDATE todo_seq SET seq = seq + 1 WHERE id = 1;
+            UPDATE todo SET change_seq = (SELECT seq FROM todo_seq WHERE id = 1),
+                date_modified = CASE WHEN NEW.date_modified IS OLD.date_modified
+                                THEN {NOW} ELSE NEW.date_modified END
+                WHERE ID = NEW.ID;
+        END""",
+     f"""CREATE TRIGGER IF NOT EXISTS todo_seq_ad AFTER DELETE ON todo
+        WHEN OLD.uuid IS NOT NULL BEGIN
+            UPDATE todo_seq SET seq = seq + 1 WHERE id = 1;
+            INSERT OR REPLACE INTO todo_tombstone (uuid, date_deleted, change_seq)
+                VALUES (OLD.uuid, {NOW}, (SELECT seq FROM todo_seq WHERE id = 1));
+        END""",
+     ),
+    # 6: Two-way sync (see replica_sync.py.) This database's own id,
+    # + how far it has read (got) & been read by (acked) each peer.
+    ("""CREATE TABLE IF NOT EXISTS sync_replica (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        replica TEXT NOT NULL)""",
+     "INSERT OR IGNORE INTO sync_replica (id, replica) VALUES (1, lower(hex(randomblob(16))))",
+     """CREATE TABLE IF NOT EXISTS sync_peer (
+        replica TEXT PRIMARY KEY,
+        got_seq INTEGER NOT NULL DEFAULT 0,
+        acked_seq INTEGER NOT NULL DEFAULT 0,
+        date_synced TEXT)""",
+     ),
+    # 7: Telling a copy of a database from the original: the file
+    # the id belongs to + the token of our last change file, per folder.
+    ("ALTER TABLE sync_replica ADD COLUMN db_file TEXT",
+     """CREATE TABLE IF NOT EXISTS sync_drop (
+        folder TEXT PRIMARY KEY,
+        token TEXT)""",
+     ),
+    # 8: Repair todo_fts. INSERT OR REPLACE (TodoApp.import_csv, until
+    # it became an upsert) deleted rows without firing todo_fts_ad.
+    (_rebuild_fts,),
+    # 9: The token of a change file being written - until it has
+    # replaced the last one (see replica_sync.write_drop.)
+    ("ALTER TABLE sync_drop ADD COLUMN next_token TEXT",
+     ),
+    # 10: Bulk inserts (db_merge, sync_tool, replica_sync) supply their
+    # own change_seq + date_modified - one todo_seq step a statement,
+    # rather than a second write of every row. Tombstones still go.
+    ("DROP TRIGGER IF EXISTS todo_seq_ai",
+     f"""CREATE TRIGGER IF NOT EXISTS todo_seq_ai AFTER INSERT ON todo
+        WHEN NEW.change_seq IS NULL BEGIN
+            UPDATE todo_seq SET seq = seq + 1 WHERE id = 1;
+            UPDATE todo SET change_seq = (SELECT seq FROM todo_seq WHERE id = 1),
+                date_modified = IFNULL(NEW.date_modified, {NOW})
+                WHERE ID = NEW.ID;
+        END""",
+     """CREATE TRIGGER IF NOT EXISTS todo_tombstone_ai AFTER INSERT ON todo
+        WHEN NEW.uuid IS NOT NULL BEGIN
+            DELETE FROM todo_tombstone WHERE uuid = NEW.uuid;
+        END""",
+     ),
+    ]
+
+LATEST = len(MIGRATIONS)
+
+def get_version(conn)->int:
+    ''' The schema version of the database. '''
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn)->int:
+    ''' Upgrade the database in place. Returns the version. '''
+    version = get_version(conn)
+    if version >= LATEST:
+        return version
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = get_version(conn) # another process may have won
+        for step in range(version, LATEST):
+            for statement in MIGRATIONS[step]:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {step + 1}")
+        conn.commit()
+    except:
+        conn.rollback()
+        raise
+    return get_version(conn)
+
+
+if __name__ == '__main__':
+    import sys
+    conn = sqlite3.connect(':memory:')
+    if migrate(conn) != LATEST:
+        print("Error 010: migrate failure.")
+        sys.exit(10)
+    if migrate(conn) != LATEST:
+        print("Error 020: re-migrate failure.")
+        sys.exit(20)
+    conn.execute("INSERT INTO todo (uuid, project_name) VALUES ('a', 'p')")
+    conn.execute("INSERT INTO todo (uuid, project_name) VALUES ('b', 'p')")
+    conn.execute("UPDATE todo SET project_name = 'q' WHERE uuid = 'a'")
+    conn.execute("DELETE FROM todo WHERE uuid = 'b'")
+    seqs = dict(conn.execute("SELECT uuid, change_seq FROM todo"))
+    dead = dict(conn.execute("SELECT uuid, change_seq FROM todo_tombstone"))
+    if seqs != {'a': 3} or dead != {'b': 4} or current_seq(conn) != 4:
+        print("Error 030: change tracking failure.", seqs, dead)
+        sys.exit(30)
+    conn.execute("INSERT INTO todo (uuid, date_modified) VALUES ('b', '2001-01-01')")
+    if conn.execute("SELECT COUNT(*) FROM todo_tombstone").fetchone()[0] or \
+       conn.execute("SELECT date_modified FROM todo WHERE uuid = 'b'").fetchone()[0] != '2001-01-01':
+        print("Error 040: resurrection failure.")
+        sys.exit(40)
+    if has_fts5(conn):
+        conn.execute("INSERT OR REPLACE INTO todo (uuid, task_description) VALUES ('a', 'stale')")
+        try:
+            conn.execute("INSERT INTO todo_fts(todo_fts, rank) VALUES ('integrity-check', 1)")
+            print("Error 045: fts damage not reproduced.")
+            sys.exit(45)
+        except sqlite3.DatabaseError:
+            pass
+        _rebuild_fts(conn)
+        conn.execute("INSERT INTO todo_fts(todo_fts, rank) VALUES ('integrity-check', 1)")
+        if conn.execute("SELECT COUNT(*) FROM todo_fts WHERE todo_fts MATCH 'stale'").fetchone()[0] != 1:
+            print("Error 050: fts rebuild failure.")
+            sys.exit(50)
+    print("Testing Success!")
@@ -0,0 +1,95 @@
+# MISSION: Full-text task search for the TUI & the GUI.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: FTS5 when the schema has it, else the classic LIKE scan.
+# DATE: 2026-10-18 10:05:37
+# FILE: search.py
+# AUTHOR: Randall Nagy
+#
+import re
+
+_WORDS = re.compile(r'\w+', re.UNICODE)
+
+def fts_query(text:str)->str:
+    ''' Quote each word + allow prefixes. None if nothing to find. '''
+    words = _WORDS.findall(text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+def has_fts(conn)->bool:
+    ''' See if the database has the todo_fts index. '''
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'todo_fts'").fetchone()
+    return row is not None
+
+def match_ids(conn, text:str)->tuple:
+    ''' A (where_clause, params) filter on todo.ID for the GUI. '''
+    query = fts_query(text)
+    if not query:
+        return '', ()
+    if has_fts(conn):
+        return ("ID IN (SELECT rowid FROM todo_fts WHERE todo_fts MATCH ?)",
+                (query,))
+    pattern = f"%{text.strip()}%"
+    return ("(project_name LIKE ? OR task_description LIKE ?)",
+            (pattern, pattern))
+
+def find(conn, text:str, mark='', limit=None, columns='t.*', snippet=True)->list:
+    ''' Best matches first. Rows carry the columns (of todo t), `next_id`
+        and - with snippet - a marked-up `snippet`.
+    '''
+    query = fts_query(text)
+    if not query:
+        return []
+    if has_fts(conn):
+        extra = ", snippet(todo_fts, 1, ?, ?, '...', 12) AS snippet" if snippet else ''
+        sql = f"""SELECT {columns}, n.ID AS next_id{extra}
+                 FROM todo_fts
+                 JOIN todo t ON t.ID = todo_fts.rowid
+                 LEFT JOIN todo n ON n.uuid = t.next_task
+                 WHERE todo_fts MATCH ?
+                 ORDER BY bm25(todo_fts, 2.0, 1.0)"""
+        params = [mark, mark, query] if snippet else [query]
+    else:
+        pattern = f"%{text.strip()}%"
+        extra = ", t.task_description AS snippet" if snippet else ''
+        sql = f"""SELECT {columns}, n.ID AS next_id{extra}
+                 FROM todo t
+                 LEFT JOIN todo n ON n.uuid = t.next_task
+                 WHERE t.project_name LIKE ? OR t.task_description LIKE ?
+                 ORDER BY t.project_name, t.task_priority, t.date_created"""
+        params = [pattern, pattern]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return conn.execute(sql, params).fetchall()
+
+
+if __name__ == '__main__':
+    import sys, sqlite3
+    if '..' not in sys.path:
+        sys.path.insert(0, '..')
+    from domaster import schema
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    schema.migrate(conn)
+    conn.executemany(
+        "INSERT INTO todo (uuid, project_name, task_description) VALUES (?, ?, ?)",
+        [('a', 'Garden', 'Plant the tomatoes'),
+         ('b', 'House', 'Paint the garden shed'),
+         ('c', 'House', 'Fix the roof')])
+    conn.commit()
+    rows = find(conn, 'garde', '*')
+    if len(rows) != 2 or rows[0]['uuid'] != 'a':
+        print("Error 010: find failure.")
+        sys.exit(10)
+    conn.execute("UPDATE todo SET task_description = 'Roof again' WHERE uuid = 'c'")
+    if len(find(conn, 'roof')) != 1 or find(conn, 'fix'):
+        print("Error 020: trigger failure.")
+        sys.exit(20)
+    rows = find(conn, 'roof', columns='t.uuid', snippet=False)
+    if [tuple(row.keys()) for row in rows] != [('uuid', 'next_id')]:
+        print("Error 030: columns failure.")
+        sys.exit(30)
+    print("Testing Success!")
@@ -0,0 +1,134 @@
+# MISSION: Keep DoMaster quick to start.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: python -m domaster.startup_bench [--save F] [--baseline F]
+# Times each start-up path with -X importtime in a fresh interpreter,
+# then fails (exit 1) when a path loads what it must not, or slows
+# down versus a saved baseline. Going over budget - a number that
+# depends on the machine - only warns.
+# DATE: 2026-10-18 16:48:10
+# FILE: startup_bench.py
+# AUTHOR: Randall Nagy
+#
+import os, sys
+import json
+import time
+import argparse
+import datetime
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each start-up path imports before its first prompt:
+MODES = {
+    'headless': "import domaster.cli",
+    'tui': "import domaster.main, domaster.tui_loop",
+    'gui': "import domaster.main, domaster.gui_loop",
+    }
+
+# ... and what it never should:
+FORBIDDEN = {
+    'headless': ('tkinter', 'domaster.gui_colors', 'domaster.ui_loop',
+                 'domaster.manage_files', 'domaster.manage_archive'),
+    'tui': ('tkinter', 'domaster.gui_colors',
+            'domaster.manage_files', 'domaster.manage_archive'),
+    'gui': ('domaster.gui_colors',
+            'domaster.manage_files', 'domaster.manage_archive'),
+    }
+
+BUDGET_MS = {'headless': 60, 'tui': 100, 'gui': 120} # import time - warns only
+SLACK = 1.25  # versus a baseline: allowed slow-down factor ...
+FLOOR_MS = 5  # ... plus this much noise
+
+def import_times(stmt)->dict:
+    ''' Run stmt in a new interpreter: top-level module -> cumulative us. '''
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', stmt],
+                          env=env, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    result = {}
+    for line in proc.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not line.startswith('import time:'):
+            continue
+        name = parts[2].rstrip()
+        if not parts[1].strip().isdigit():
+            continue # the heading
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        result.setdefault('*', set()).add(name.strip())
+        if depth == 0:
+            result[name.strip()] = int(parts[1])
+    return result
+
+def measure(mode, runs=5)->dict:
+    ''' Best of runs: import ms + wall ms, beyond a bare interpreter. '''
+    startup = set(import_times("pass"))
+    best = None
+    for ss in range(runs):
+        began = time.perf_counter()
+        times = import_times(MODES[mode])
+        wall = (time.perf_counter() - began) * 1000
+        loaded = times.pop('*')
+        ours = {name: us for name, us in times.items() if name not in startup}
+        total = sum(ours.values()) / 1000
+        if not best or total < best['import_ms']:
+            best = {
+                'import_ms': round(total, 2),
+                'wall_ms': round(wall, 2),
+                'top': sorted(ours.items(), key=lambda kv: -kv[1])[:5],
+                'loaded': loaded
+                }
+    return best
+
+def check(mode, result, baseline=None, slack=SLACK)->tuple:
+    ''' Every way this result fails the gate - then what it only warns of. '''
+    problems = []; warnings = []
+    for name in FORBIDDEN[mode]:
+        if name in result['loaded']:
+            problems.append(f"{mode}: imports {name}")
+    if result['import_ms'] > BUDGET_MS[mode]:
+        warnings.append(f"{mode}: {result['import_ms']}ms over the {BUDGET_MS[mode]}ms budget")
+    if baseline and mode in baseline:
+        limit = baseline[mode]['import_ms'] * slack + FLOOR_MS
+        if result['import_ms'] > limit:
+            problems.append(f"{mode}: {result['import_ms']}ms, was {baseline[mode]['import_ms']}ms")
+    return problems, warnings
+
+def main(argv=None)->int:
+    parser = argparse.ArgumentParser(prog='python -m domaster.startup_bench')
+    parser.add_argument('modes', nargs='*', help=f"any of {', '.join(MODES)} (default: all)")
+    parser.add_argument('-r', '--runs', type=int, default=5)
+    parser.add_argument('--save', help="record the results to a JSON file")
+    parser.add_argument('--baseline', help="fail on a slow-down versus a saved JSON file")
+    parser.add_argument('--slack', type=float, default=SLACK)
+    args = parser.parse_args(argv)
+    for mode in args.modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode {mode!r}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['modes']
+    problems = []; warnings = []; record = {}
+    for mode in args.modes or list(MODES):
+        result = measure(mode, max(args.runs, 1))
+        failed, warned = check(mode, result, baseline, args.slack)
+        problems += failed; warnings += warned
+        top = ', '.join(f"{name} {us / 1000:.1f}" for name, us in result['top'])
+        print(f"{mode:<9} import {result['import_ms']:7.2f}ms  wall {result['wall_ms']:7.2f}ms  [{top}]")
+        record[mode] = {key: result[key] for key in ('import_ms', 'wall_ms', 'top')}
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                       'python': sys.version.split()[0],
+                       'modes': record}, f, indent=4)
+    for warning in warnings:
+        print(f"WARN {warning}")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
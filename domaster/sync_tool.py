@@ -18,112 +18,231 @@ are to be automatically detected from the SQLite
 format's metadata for the table. include a robust
 set of test cases.
 '''
-import os, sys
+import os, sys, time
 import csv, uuid
+import itertools
 import sqlite3
-from domaster.ui_loop import *
+from domaster.db_pool import DbPool
+from domaster.task_row import batches
+from domaster import schema
 
 try:
     if '..' not in sys.path:
         sys.path.insert(0,'..')
-    from domaster.upsert import UpsertSqlite
+    try:
+        from domaster.upsert import UpsertSqlite
+    except ImportError:
+        from domaster.Upsert import UpsertSqlite # case-sensitive file systems
 except Exception as ex:
     pass
 
+CHUNK_ROWS = 5000 # rows per staging / upsert batch
+DELETED = 'date_deleted' # the extra column of a changes file: tombstones
+CHECKPOINTS = 'sync_checkpoints' # Keeps option: {db>name: change_seq}
+
 class SQLiteCSVSync:
-    def __init__(self, db_path, table_name, driver):
+    def __init__(self, db_path, table_name, driver, pool=None):
         self.db_path = db_path
         self.table_name = table_name
         self.driver = driver
+        if not pool or pool.db_file != db_path:
+            pool = DbPool(db_path)
+        self.pool = pool
 
     def _get_column_names(self):
         """Automatically detects table column names from metadata."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         try:
             cursor = conn.cursor()
             # PRAGMA table_info returns (id, name, type, notnull, default_value, pk)
             cursor.execute(f"PRAGMA table_info({self.table_name})")
-            columns = [info[1] for info in cursor.fetchall()]
+            columns = [info[1] for info in cursor.fetchall()
+                       if info[1] not in schema.LOCAL_COLUMNS]
             if not columns:
                 raise ValueError(f"Table '{self.table_name}' not found or empty.")
             return UpsertSqlite.JunkId(columns)
         except:
             pass
-        finally:
-            conn.close()
 
-    def export_to_csv(self, csv_file)->bool:
+    def export_to_csv(self, csv_file, since=None)->bool:
         """ Export all data from the detected table to a CSV file.
+            With since (a change_seq), export only the rows changed
+            after it - plus the uuids deleted (see write_csv.)
             Return True on success.
         """
-        columns = self._get_column_names()
-        conn = sqlite3.connect(self.db_path)
         try:
-            cursor = conn.cursor()
-            cursor.execute(f"SELECT {', '.join(columns)} FROM {self.table_name}")
-            rows = cursor.fetchall()
-
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(columns) # Header
-                writer.writerows(rows)
+            self.write_csv(csv_file, since)
         except:
             pass
-        finally:
-            conn.close()
         return os.path.exists(csv_file)
 
-    def import_from_csv(self, csv_file)->int:
+    def write_csv(self, csv_file, since=None)->int:
+        """ Export - returning the number of rows written. A changes
+            file (since=...) has an extra DELETED column: its rows
+            with a DELETED date are tombstones - the uuid alone.
+        """
+        columns = self._get_column_names()
+        conn = self.pool.connect()
+        cursor = conn.cursor()
+        sql = f"SELECT {', '.join(columns)} FROM {self.table_name}"
+        count = 0
+        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if since is None:
+                writer.writerow(columns) # Header
+                cursor.execute(sql)
+                for batch in batches(cursor, CHUNK_ROWS):
+                    writer.writerows(batch.rows())
+                    count += len(batch)
+                return count
+            writer.writerow(columns + [DELETED])
+            cursor.execute(sql + " WHERE change_seq > ? ORDER BY change_seq", (since,))
+            for batch in batches(cursor, CHUNK_ROWS):
+                writer.writerows(row + ('',) for row in batch.rows())
+                count += len(batch)
+            blank = [''] * len(columns)
+            at = columns.index('uuid')
+            cursor.execute("SELECT uuid, date_deleted FROM todo_tombstone"
+                           " WHERE change_seq > ? ORDER BY change_seq", (since,))
+            for batch in batches(cursor, CHUNK_ROWS):
+                for uuid_, date_deleted in batch.rows():
+                    row = blank[:]
+                    row[at] = uuid_
+                    writer.writerow(row + [date_deleted])
+                    count += 1
+        return count
+
+    def checkpoint_key(self, name)->str:
+        return f"{os.path.abspath(self.db_path)}>{name}"
+
+    def get_checkpoint(self, name)->int:
+        """ The change_seq the last export_changes(name) reached. """
+        from domaster.keeper import Keeps
+        marks = Keeps.get_option(CHECKPOINTS, default_value={})
+        return marks.get(self.checkpoint_key(name), 0)
+
+    def set_checkpoint(self, name, seq):
+        from domaster.keeper import Keeps
+        with Keeps.batch() as options:
+            marks = dict(options.get(CHECKPOINTS) or {})
+            marks[self.checkpoint_key(name)] = seq
+            options[CHECKPOINTS] = marks
+
+    def export_changes(self, csv_file, name='default')->int:
+        """ Export what changed since the last export to name, then
+            move name's checkpoint. Returns the number of rows.
+        """
+        conn = self.pool.connect()
+        schema.migrate(conn)
+        seq = schema.current_seq(conn) # later changes go next time, too
+        count = self.write_csv(csv_file, self.get_checkpoint(name))
+        self.set_checkpoint(name, seq)
+        return count
+
+    def import_from_csv(self, csv_file, confirm=True, report=None)->int:
         """ Import CSV data using 'uuid' as the key for UPSERT logic.
-            Returns the number of rows imported.
+            Rows are streamed through a temporary staging table in
+            chunks, so memory stays bounded on very large files.
+            The summary goes to report(str) - API.do_print by default.
+            Returns the number of rows imported, -1 when declined.
         """
         if not os.path.exists(csv_file):
             raise FileNotFoundError(f"CSV file '{csv_file}' not found.")
 
         columns = self._get_column_names()
-        if 'uuid' not in columns:
+        if not columns or 'uuid' not in columns:
             raise ValueError("Table must have a 'uuid' column for synchronization.")
 
-        # Create a uuid for any lacking same.
-        inventory = []
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if not row['uuid']:
-                    row['uuid'] = uuid.uuid4()
-                inventory.append(row)
-
-        # Approve effect of data imporatation.
-        conn = sqlite3.connect(self.db_path)
-        new_rows = 0; old_rows = 0
-        for row in inventory:
-            next_t = row['uuid']
-            res = conn.execute(f'SELECT * FROM todo WHERE uuid = "{next_t}" LIMIT 1;')
-            if res:
-                old_rows += 1
-            else:
-                new_rows += 1
-        conn.close()
-        yn = API.ui_driver.input(f'Ok to update {old_rows} and create {new_rows} todo items? y/n ').strip().lower()
-        if not yn or yn[0] != 'y':
-            return -1
-        
-        # Dynamic UPSERT query construction
-        placeholders = ", ".join(["?"] * len(columns))
+        began = time.perf_counter()
         col_list = ", ".join(columns)
-        update_set = ", ".join([f"{col} = excluded.{col}" for col in columns if col != 'uuid'])
-        upsert_sql = f"""
-            INSERT INTO {self.table_name} ({col_list})
-            VALUES ({placeholders})
-            ON CONFLICT(uuid) DO UPDATE SET {update_set}
-        """
-        conn = sqlite3.connect(self.db_path)
+        placeholders = ", ".join(["?"] * len(columns))
+        conn = self.pool.connect()
+        conn.execute("DROP TABLE IF EXISTS temp.csv_staging")
+        conn.execute("DROP TABLE IF EXISTS temp.csv_deletes")
+        conn.execute(f"CREATE TEMP TABLE csv_staging ({col_list})")
+        conn.execute("CREATE TEMP TABLE csv_deletes (uuid TEXT PRIMARY KEY)")
         try:
-            data = [tuple(row[col] for col in columns) for row in inventory]
-            conn.executemany(upsert_sql, data)
+            # Stage the file, one chunk at a time.
+            staged = 0
+            stage_sql = f"INSERT INTO temp.csv_staging ({col_list}) VALUES ({placeholders})"
+            with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.DictReader(f)
+                while True:
+                    chunk = list(itertools.islice(reader, CHUNK_ROWS))
+                    if not chunk:
+                        break
+                    gone = [(row['uuid'],) for row in chunk if row.get(DELETED)]
+                    if gone: # a changes file's tombstones
+                        conn.executemany("INSERT OR IGNORE INTO temp.csv_deletes VALUES (?)", gone)
+                        chunk = [row for row in chunk if not row.get(DELETED)]
+                    conn.executemany(stage_sql,
+                        [self._stage_row(row, columns) for row in chunk])
+                    staged += len(chunk)
             conn.commit()
+
+            # Approve effect of data importation - one set-based pass.
+            total, old_rows = conn.execute(
+                f"""SELECT COUNT(*), COUNT(t.uuid) FROM temp.csv_staging s
+                    LEFT JOIN {self.table_name} t ON t.uuid = s.uuid""").fetchone()
+            new_rows = total - old_rows
+            deletes = conn.execute(
+                f"""SELECT COUNT(*) FROM temp.csv_deletes d
+                    JOIN {self.table_name} t ON t.uuid = d.uuid""").fetchone()[0]
+            if confirm:
+                from domaster.ui_loop import API
+                also = f' and delete {deletes}' if deletes else ''
+                yn = API.ui_driver.input(f'Ok to update {old_rows}, create {new_rows}{also} todo items? y/n ').strip().lower()
+                if not yn or yn[0] != 'y':
+                    return -1
+
+            # Dynamic UPSERT query construction - unchanged rows are
+            # left alone, so they keep their change_seq. ('' is NULL,
+            # as a CSV file cannot tell them apart.) Changed rows take
+            # the next change_seq here - with the file's date_modified -
+            # as do new rows.
+            others = [col for col in columns if col not in ('uuid', 'change_seq')]
+            update_set = ", ".join([f"{col} = excluded.{col}" for col in others
+                                    if col != 'date_modified'] +
+                                   [f"change_seq = (SELECT seq + 1 FROM todo_seq WHERE id = 1)"])
+            if 'date_modified' in others:
+                update_set += f", date_modified = IFNULL(excluded.date_modified, {schema.NOW})"
+            differs = " OR ".join([f"NULLIF({col}, '') IS NOT NULLIF(excluded.{col}, '')"
+                                   for col in others if col != 'date_modified']) or "0"
+            picks = ", ".join([f"IFNULL(date_modified, {schema.NOW})" if col == 'date_modified'
+                               else col for col in columns] +
+                              ["(SELECT seq + 1 FROM todo_seq WHERE id = 1)"])
+            upsert_sql = f"""
+                INSERT INTO {self.table_name} ({col_list}, change_seq)
+                SELECT {picks} FROM temp.csv_staging
+                WHERE rowid > ? AND rowid <= ? ORDER BY rowid
+                ON CONFLICT(uuid) DO UPDATE SET {update_set} WHERE {differs}
+            """
+            last = conn.execute("SELECT MAX(rowid) FROM temp.csv_staging").fetchone()[0] or 0
+            for low in range(0, last, CHUNK_ROWS):
+                if conn.execute(upsert_sql, (low, low + CHUNK_ROWS)).rowcount:
+                    conn.execute("UPDATE todo_seq SET seq = seq + 1 WHERE id = 1")
+                conn.commit()
+            if deletes:
+                conn.execute(f"DELETE FROM {self.table_name} WHERE uuid IN (SELECT uuid FROM temp.csv_deletes)")
+                conn.commit()
         except:
-            pass
+            conn.rollback()
+            raise
         finally:
-            conn.close()
-        return len(data)
+            conn.execute("DROP TABLE IF EXISTS temp.csv_staging")
+            conn.execute("DROP TABLE IF EXISTS temp.csv_deletes")
+        elapsed = max(time.perf_counter() - began, 1e-6)
+        if report is None:
+            from domaster.ui_loop import API
+            report = API.do_print
+        report(f"Imported {staged} rows in {elapsed:.2f}s ({staged / elapsed:,.0f} rows/sec).")
+        if deletes:
+            report(f"Deleted {deletes} rows.")
+        return staged
+
+    @staticmethod
+    def _stage_row(row, columns)->tuple:
+        """ Give any row lacking a uuid a new one. Empty cells are NULL. """
+        if not row.get('uuid'):
+            row['uuid'] = str(uuid.uuid4())
+        return tuple(row.get(col) or None for col in columns)
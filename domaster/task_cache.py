@@ -0,0 +1,113 @@
+# MISSION: Stop re-reading what has not changed.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: LRU over counts, rows and lists - dropped whenever the
+# database changes, by this or any other process.
+# DATE: 2026-10-18 17:20:41
+# FILE: task_cache.py
+# AUTHOR: Randall Nagy
+#
+import sys
+from collections import OrderedDict
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster.db_pool import data_stamp
+
+MAX_ROWS = 50000 # cached rows (a list of n rows weighs n)
+
+class TaskCache:
+    '''
+Memoize read queries: get(conn, key, load) returns the cached
+value for key, else load() - remembered. Before every lookup the
+connection's data_stamp() is compared with the one the entries
+were read under; any write anywhere empties the cache. Entries
+are evicted least-recently-used once their weight passes max_rows.
+Cached values are shared: treat them as read-only.
+'''
+    def __init__(self, max_rows=MAX_ROWS):
+        self.max_rows = max_rows
+        self.entries = OrderedDict() # key -> (value, weight)
+        self.weight = 0
+        self.stamp = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clears = 0
+
+    def clear(self):
+        if self.entries:
+            self.clears += 1
+        self.entries.clear()
+        self.weight = 0
+        self.stamp = None
+
+    def check(self, conn):
+        ''' Drop everything once the database has changed. '''
+        stamp = data_stamp(conn)
+        if stamp != self.stamp:
+            self.clear()
+            self.stamp = stamp
+
+    def get(self, conn, key, load):
+        self.check(conn)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        value = load()
+        weight = len(value) if isinstance(value, list) else 1
+        if weight > self.max_rows:
+            return value # too big to keep
+        self.entries[key] = (value, weight)
+        self.weight += weight
+        while self.weight > self.max_rows:
+            old, (_, old_weight) = self.entries.popitem(last=False)
+            self.weight -= old_weight
+            self.evictions += 1
+        return value
+
+    def stats(self)->dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'entries': len(self.entries),
+            'rows': self.weight,
+            'evictions': self.evictions,
+            'clears': self.clears
+            }
+
+
+if __name__ == '__main__':
+    import os, sqlite3, tempfile
+    db_file = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE t (v)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(ss,) for ss in range(10)])
+    conn.commit()
+    cache = TaskCache(max_rows=15)
+    count = lambda: cache.get(conn, 'count', lambda: conn.execute("SELECT COUNT(*) FROM t").fetchone()[0])
+    if count() != 10 or count() != 10 or cache.hits != 1:
+        print("Error 010: hit failure.")
+        sys.exit(10)
+    conn.execute("INSERT INTO t VALUES (10)")
+    conn.commit()
+    if count() != 11:
+        print("Error 020: own write failure.")
+        sys.exit(20)
+    other = sqlite3.connect(db_file)
+    other.execute("DELETE FROM t")
+    other.commit()
+    if count() != 0:
+        print("Error 030: other writer failure.")
+        sys.exit(30)
+    cache.get(conn, 'a', lambda: list(range(10)))
+    cache.get(conn, 'b', lambda: list(range(10)))
+    if 'a' in cache.entries or 'b' not in cache.entries or cache.weight > 15:
+        print("Error 040: LRU failure.")
+        sys.exit(40)
+    print("Testing Success!")
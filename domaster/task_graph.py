@@ -0,0 +1,224 @@
+# MISSION: Dependency graph over todo.next_task.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: A task blocks its `next_task`. One query, compact arrays,
+# rebuilt only when the database changes.
+# DATE: 2026-10-18 14:40:27
+# FILE: task_graph.py
+# AUTHOR: Randall Nagy
+#
+import sys
+from array import array
+from collections import deque
+
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+from domaster.db_pool import data_stamp
+
+class TaskGraph:
+    '''
+Nodes are tasks (by position), each with at most one
+successor - its next_task. Predecessors are kept in CSR
+form: preds[pred_start[n]:pred_start[n + 1]].
+'''
+    def __init__(self, rows):
+        ''' rows: (ID, uuid, next_task, date_done) '''
+        rows = list(rows)
+        count = len(rows)
+        self.ids = array('q', (r[0] for r in rows))
+        self.done = bytearray(1 if r[3] else 0 for r in rows)
+        self.index = {r[0]: ss for ss, r in enumerate(rows)}
+        by_uuid = {r[1]: ss for ss, r in enumerate(rows) if r[1]}
+        self.succ = array('l', (by_uuid.get(r[2], -1) if r[2] else -1 for r in rows))
+        counts = array('l', [0]) * (count + 1)
+        for nxt in self.succ:
+            if nxt >= 0:
+                counts[nxt + 1] += 1
+        for ss in range(count):
+            counts[ss + 1] += counts[ss]
+        self.pred_start = array('l', counts)
+        self.preds = array('l', [0]) * counts[count]
+        fill = array('l', counts)
+        for ss, nxt in enumerate(self.succ):
+            if nxt >= 0:
+                self.preds[fill[nxt]] = ss
+                fill[nxt] += 1
+
+    @staticmethod
+    def from_db(conn):
+        rows = conn.execute("SELECT ID, uuid, next_task, date_done FROM todo ORDER BY ID")
+        return TaskGraph(rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def is_pending(self, node)->bool:
+        return not self.done[node]
+
+    def predecessors(self, node):
+        return self.preds[self.pred_start[node]:self.pred_start[node + 1]]
+
+    def _pending_in(self)->array:
+        ''' Pending predecessors per node. '''
+        degree = array('l', [0]) * len(self.ids)
+        for ss, nxt in enumerate(self.succ):
+            if nxt >= 0 and not self.done[ss]:
+                degree[nxt] += 1
+        return degree
+
+    def topo_order(self, pending_only=True)->tuple:
+        ''' IDs in dependency order + the IDs caught in cycles.
+            Done tasks never block anything.
+        '''
+        degree = self._pending_in()
+        ready = deque(ss for ss in range(len(self.ids))
+                      if degree[ss] == 0 and not (pending_only and self.done[ss]))
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(self.ids[node])
+            nxt = self.succ[node]
+            if nxt >= 0 and not self.done[node]:
+                degree[nxt] -= 1
+                if degree[nxt] == 0 and not (pending_only and self.done[nxt]):
+                    ready.append(nxt)
+        placed = set(order)
+        stuck = [tid for ss, tid in enumerate(self.ids)
+                 if tid not in placed and not (pending_only and self.done[ss])]
+        return order, stuck
+
+    def cycles(self)->list:
+        ''' Every next_task loop, as lists of IDs. '''
+        state = bytearray(len(self.ids)) # 0 new, 1 walking, 2 finished
+        found = []
+        for start in range(len(self.ids)):
+            path = []; node = start
+            while node >= 0 and state[node] == 0:
+                state[node] = 1
+                path.append(node)
+                node = self.succ[node]
+            if node >= 0 and state[node] == 1:
+                loop = path[path.index(node):]
+                found.append([self.ids[ss] for ss in loop])
+            for ss in path:
+                state[ss] = 2
+        return found
+
+    def blockers(self, tid)->list:
+        ''' IDs of every pending task that - transitively - blocks tid. '''
+        start = self.index.get(tid)
+        if start is None:
+            return []
+        seen = {start}; queue = deque([start]); result = []
+        while queue:
+            for pred in self.predecessors(queue.popleft()):
+                if pred not in seen and not self.done[pred]:
+                    seen.add(pred)
+                    result.append(self.ids[pred])
+                    queue.append(pred)
+        return result
+
+    def chain(self, tid)->list:
+        ''' IDs that tid blocks - its next_task, and onward. '''
+        node = self.index.get(tid, -1)
+        result = []; seen = {node}
+        node = self.succ[node] if node >= 0 else -1
+        while node >= 0 and node not in seen:
+            seen.add(node)
+            result.append(self.ids[node])
+            node = self.succ[node]
+        return result
+
+    def depths(self)->dict:
+        ''' ID -> the longest chain of pending blockers ahead of it. '''
+        order, stuck = self.topo_order()
+        depth = {}
+        for tid in order:
+            node = self.index[tid]
+            best = 0
+            for pred in self.predecessors(node):
+                if not self.done[pred]:
+                    best = max(best, depth.get(self.ids[pred], 0) + 1)
+            depth[tid] = best
+        return depth
+
+    def depth(self, tid)->int:
+        return self.depths().get(tid, 0)
+
+    def critical_path(self)->list:
+        ''' The longest chain of pending tasks, first to last. '''
+        depth = self.depths()
+        if not depth:
+            return []
+        tid = max(depth, key=lambda key: (depth[key], -key))
+        path = [tid]
+        while depth[tid]:
+            node = self.index[tid]
+            tid = max((self.ids[pred] for pred in self.predecessors(node)
+                       if not self.done[pred] and self.ids[pred] in depth),
+                      key=lambda key: (depth[key], -key))
+            path.append(tid)
+        return path[::-1]
+
+
+class GraphCache:
+    '''
+The last graph built, with the data_stamp() it was read under. Like
+TaskCache, one belongs to each app - clear() it when the app
+switches database files. (A new connection's stamp can repeat an
+old one's.)
+'''
+    def __init__(self):
+        self.stamp = None
+        self.graph = None
+
+    def clear(self):
+        self.stamp = None
+        self.graph = None
+
+    def get(self, conn)->TaskGraph:
+        ''' The graph for conn - rebuilt only after the database changed. '''
+        stamp = data_stamp(conn)
+        if self.graph is not None and self.stamp == stamp:
+            return self.graph
+        self.graph = TaskGraph.from_db(conn)
+        self.stamp = data_stamp(conn)
+        return self.graph
+
+
+if __name__ == '__main__':
+    import sqlite3
+    from domaster import schema
+    conn = sqlite3.connect(':memory:')
+    schema.migrate(conn)
+    # 1 -> 2 -> 3, 4 -> 3, 5 <-> 6, 7 done -> 1
+    links = {1: 2, 2: 3, 4: 3, 5: 6, 6: 5, 7: 1}
+    for tid in range(1, 8):
+        nxt = f'u{links[tid]}' if tid in links else 0
+        done = 'x' if tid == 7 else None
+        conn.execute("INSERT INTO todo (ID, uuid, next_task, date_done) VALUES (?, ?, ?, ?)",
+                     (tid, f'u{tid}', nxt, done))
+    conn.commit()
+    graphs = GraphCache()
+    graph = graphs.get(conn)
+    order, stuck = graph.topo_order()
+    if order.index(1) > order.index(2) or order.index(2) > order.index(3) or sorted(stuck) != [5, 6]:
+        print("Error 010: topo_order failure.")
+        sys.exit(10)
+    if [sorted(loop) for loop in graph.cycles()] != [[5, 6]]:
+        print("Error 020: cycles failure.")
+        sys.exit(20)
+    if sorted(graph.blockers(3)) != [1, 2, 4] or graph.chain(1) != [2, 3]:
+        print("Error 030: blockers / chain failure.")
+        sys.exit(30)
+    if graph.depth(3) != 2 or graph.critical_path() != [1, 2, 3]:
+        print("Error 040: depth / critical_path failure.")
+        sys.exit(40)
+    if graphs.get(conn) is not graph:
+        print("Error 050: cache failure.")
+        sys.exit(50)
+    conn.execute("UPDATE todo SET date_done = 'x' WHERE ID = 1")
+    if graphs.get(conn) is graph:
+        print("Error 060: cache invalidation failure.")
+        sys.exit(60)
+    print("Testing Success!")
@@ -0,0 +1,128 @@
+# MISSION: Keyset pagination over the todo table.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: Pages cost the same on page 1 as on page 10,000.
+# DATE: 2026-10-18 12:31:09
+# FILE: task_pager.py
+# AUTHOR: Randall Nagy
+#
+
+# The view order - and its index - (see schema.py.)
+KEY_A = "IFNULL(project_name, '')"
+KEY_B = "IFNULL(task_priority, '')"
+KEY_C = "ID"
+
+class TaskPager:
+    '''
+Page through todo in (project_name, task_priority, ID) order,
+ascending or descending. Pages resume from the key of a row on
+display rather than from an OFFSET, so each page is an index
+seek. Rows must include project_name, task_priority and ID.
+'''
+    def __init__(self, connect, columns="*", where="", params=(), descending=False):
+        self.connect = connect # returns a connection
+        self.columns = columns
+        self.where = where or "1"
+        self.params = tuple(params)
+        self.descending = descending
+
+    @staticmethod
+    def key(row)->tuple:
+        ''' The view-order key of a row. '''
+        proj, pri = row['project_name'], row['task_priority']
+        return ('' if proj is None else proj,
+                '' if pri is None else pri,
+                row['ID'])
+
+    def _order(self, forward=True)->str:
+        way = "DESC" if self.descending == forward else "ASC"
+        return f" ORDER BY {KEY_A} {way}, {KEY_B} {way}, {KEY_C} {way}"
+
+    def _select(self, clause="", params=(), forward=True, limit=None, offset=None):
+        sql = f"SELECT {self.columns} FROM todo WHERE ({self.where}){clause}"
+        sql += self._order(forward)
+        params = self.params + tuple(params)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+            if offset:
+                sql += " OFFSET ?"
+                params += (int(offset),)
+        return self.connect().execute(sql, params).fetchall()
+
+    def _past(self, key, forward=True, inclusive=False)->tuple:
+        ''' A clause for the rows beyond key, in either direction. '''
+        later = (self.descending == forward)
+        op = ('<' if later else '>') + ('=' if inclusive else '')
+        lead = '<=' if later else '>='
+        # Bound the leading column so the index can seek:
+        clause = (f" AND {KEY_A} {lead} ?"
+                  f" AND ({KEY_A}, {KEY_B}, {KEY_C}) {op} (?, ?, ?)")
+        return clause, (key[0],) + tuple(key)
+
+    def total(self)->int:
+        sql = f"SELECT COUNT(*) FROM todo WHERE ({self.where})"
+        return self.connect().execute(sql, self.params).fetchone()[0]
+
+    def first(self, count)->list:
+        return self._select(limit=count)
+
+    def last(self, count)->list:
+        return self._select(forward=False, limit=count)[::-1]
+
+    def after(self, key, count, inclusive=False)->list:
+        ''' Up to count rows following key. '''
+        clause, params = self._past(key, True, inclusive)
+        return self._select(clause, params, limit=count)
+
+    def before(self, key, count)->list:
+        ''' Up to count rows preceding key, in view order. '''
+        clause, params = self._past(key, False)
+        return self._select(clause, params, forward=False, limit=count)[::-1]
+
+    def at(self, offset, count)->list:
+        ''' Rows from an absolute position - for long jumps only. '''
+        return self._select(limit=count, offset=max(int(offset), 0))
+
+    def position(self, key)->int:
+        ''' The number of rows ahead of key. '''
+        clause, params = self._past(key, False)
+        sql = f"SELECT COUNT(*) FROM todo WHERE ({self.where}){clause}"
+        return self.connect().execute(sql, self.params + params).fetchone()[0]
+
+    def find_id(self, tid)->tuple:
+        ''' The key of task tid - when it passes the filter. '''
+        row = self._select(" AND ID = ?", (tid,), limit=1)
+        return self.key(row[0]) if row else None
+
+
+if __name__ == '__main__':
+    import sys, sqlite3, random
+    if '..' not in sys.path:
+        sys.path.insert(0, '..')
+    from domaster import schema
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    schema.migrate(conn)
+    conn.executemany(
+        "INSERT INTO todo (uuid, project_name, task_priority) VALUES (?, ?, ?)",
+        [(str(ss), random.choice(['a', 'b', None]),
+          random.choice([1, 2, '', None])) for ss in range(500)])
+    for descending in False, True:
+        pager = TaskPager(lambda: conn, descending=descending)
+        everything = [r['ID'] for r in pager.first(1000)]
+        walked = []; page = pager.first(7)
+        while page:
+            walked += [r['ID'] for r in page]
+            page = pager.after(pager.key(page[-1]), 7)
+        if walked != everything:
+            print("Error 010: keyset walk failure.")
+            sys.exit(10)
+        back = pager.before(pager.key(pager.at(100, 1)[0]), 5)
+        if [r['ID'] for r in back] != everything[95:100]:
+            print("Error 020: keyset before failure.")
+            sys.exit(20)
+        if pager.position(pager.find_id(everything[42])) != 42:
+            print("Error 030: position failure.")
+            sys.exit(30)
+    print("Testing Success!")
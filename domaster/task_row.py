@@ -0,0 +1,132 @@
+# MISSION: One compact record type for every row DoMaster reads.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: Tuple-backed, no per-row dict. row['name'], row[0],
+# row.name, row.keys() and dict(row) all work.
+# DATE: 2026-10-18 17:58:02
+# FILE: task_row.py
+# AUTHOR: Randall Nagy
+#
+from collections import namedtuple
+
+FETCH_ROWS = 1000 # rows per TaskBatch
+
+_types = {} # column names (or a cursor.description) -> Task class
+_last = (None, None) # the description + class of the latest row
+
+def task_type(names:tuple)->type:
+    ''' The Task class for a set of column names - made once. '''
+    cls = _types.get(names)
+    if cls is None:
+        base = namedtuple('Task', names, rename=True)
+        index = {}
+        for ss, name in enumerate(names):
+            index.setdefault(name, ss) # first of duplicate names wins
+        class Task(base):
+            ''' A row: a tuple, plus sqlite3.Row style access by name. '''
+            __slots__ = ()
+            _names = names
+            _index = index
+
+            def __getitem__(self, key):
+                if isinstance(key, str):
+                    return tuple.__getitem__(self, self._index[key])
+                return tuple.__getitem__(self, key)
+
+            def keys(self)->list:
+                return list(self._names)
+
+            def get(self, key, default=None):
+                ss = self._index.get(key)
+                return default if ss is None else tuple.__getitem__(self, ss)
+
+        cls = _types[names] = Task
+    return cls
+
+def task_factory(cursor, row):
+    ''' sqlite3 row_factory: rows become Task records. '''
+    global _last
+    desc = cursor.description
+    last_desc, cls = _last
+    if desc is not last_desc: # else: same result set as the last row
+        cls = _types.get(desc)
+        if cls is None:
+            cls = _types[desc] = task_type(tuple(d[0] for d in desc))
+        _last = (desc, cls)
+    return tuple.__new__(cls, row)
+
+
+class TaskBatch:
+    '''
+A block of rows stored by column - for bulk export, import and
+reports. columns[n] holds every value of names[n].
+'''
+    __slots__ = ('names', 'columns', '_index')
+
+    def __init__(self, names, rows):
+        self.names = tuple(names)
+        self._index = {name: ss for ss, name in reversed(list(enumerate(self.names)))}
+        self.columns = tuple(zip(*rows)) if rows else tuple(() for name in self.names)
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def column(self, name)->tuple:
+        return self.columns[self._index[name]]
+
+    def rows(self):
+        ''' Plain tuples, row by row. '''
+        return zip(*self.columns)
+
+    def records(self):
+        ''' Task records, row by row. '''
+        cls = task_type(self.names)
+        return (tuple.__new__(cls, row) for row in zip(*self.columns))
+
+def batches(cursor, size=FETCH_ROWS):
+    ''' A cursor's result as TaskBatch blocks of up to size rows. '''
+    names = tuple(d[0] for d in cursor.description)
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield TaskBatch(names, rows)
+
+
+if __name__ == '__main__':
+    import sys, sqlite3, tracemalloc
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = task_factory
+    conn.execute("CREATE TABLE todo (ID INTEGER PRIMARY KEY, uuid, project_name)")
+    conn.executemany("INSERT INTO todo (uuid, project_name) VALUES (?, ?)",
+                     [(f'u{ss}', f'p{ss % 7}') for ss in range(20000)])
+    row = conn.execute("SELECT *, ID AS next_id FROM todo WHERE ID = 3").fetchone()
+    if (row['uuid'], row[1], row.project_name, row.get('nope', 0)) != ('u2', 'u2', 'p2', 0):
+        print("Error 010: access failure.")
+        sys.exit(10)
+    if dict(row) != {'ID': 3, 'uuid': 'u2', 'project_name': 'p2', 'next_id': 3} or row[:2] != (3, 'u2'):
+        print("Error 020: dict / slice failure.")
+        sys.exit(20)
+    total = 0
+    for batch in batches(conn.execute("SELECT ID, project_name FROM todo")):
+        total += sum(batch.column('ID'))
+    if total != sum(range(1, 20001)):
+        print("Error 030: batch failure.")
+        sys.exit(30)
+    sizes = {}
+    for name, factory, convert in (('dict(Row)', sqlite3.Row, dict),
+                                   ('sqlite3.Row', sqlite3.Row, None),
+                                   ('Task', task_factory, None)):
+        conn.row_factory = factory
+        tracemalloc.start()
+        rows = conn.execute("SELECT * FROM todo").fetchall()
+        if convert:
+            rows = [convert(r) for r in rows]
+        sizes[name] = tracemalloc.get_traced_memory()[0] // len(rows)
+        tracemalloc.stop()
+        del rows
+    print(', '.join(f"{name} {size} bytes/row" for name, size in sizes.items()))
+    if sizes['Task'] >= sizes['dict(Row)']:
+        print("Error 040: memory failure.")
+        sys.exit(40)
+    print("Testing Success!")
@@ -0,0 +1,142 @@
+# MISSION: Virtual scrolling for very large Treeviews.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: Only the rows in view ever reach Tk.
+# DATE: 2026-10-18 12:58:40
+# FILE: tk_virtual.py
+# AUTHOR: Randall Nagy
+#
+import sys
+if '..' not in sys.path:
+    sys.path.insert(0, '..')
+
+class VirtualTree:
+    '''
+Drive a ttk.Treeview + Scrollbar from a TaskPager: fetch and
+render(rows) just the window of rows that fits the widget. The
+scrollbar shows the window's place within the whole result.
+'''
+    def __init__(self, tree, scrollbar, render, row_height=32):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.render = render
+        self.row_height = row_height
+        self.pager = None
+        self.rows = []
+        self.total = 0
+        self.offset = 0
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", lambda e: self.refresh(recount=False))
+        tree.bind("<MouseWheel>", self.on_wheel)
+        tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        tree.bind("<Button-5>", lambda e: self.scroll(3))
+        tree.bind("<Up>", lambda e: self.on_key(-1))
+        tree.bind("<Down>", lambda e: self.on_key(1))
+        tree.bind("<Prior>", lambda e: self.scroll(-self.page_size()))
+        tree.bind("<Next>", lambda e: self.scroll(self.page_size()))
+        tree.bind("<Home>", lambda e: self.yview("moveto", 0))
+        tree.bind("<End>", lambda e: self.yview("moveto", 1))
+
+    def page_size(self)->int:
+        ''' Rows that fit - less the heading. '''
+        return max(self.tree.winfo_height() // self.row_height - 1, 1)
+
+    def set_pager(self, pager, total=None, rows=None):
+        ''' Show a new result, from the top. The count and the
+            first rows may already have been fetched elsewhere.
+        '''
+        self.pager = pager
+        self.total = pager.total() if total is None else total
+        self.offset = 0
+        if rows is None:
+            rows = pager.first(self.page_size())
+        self.show(rows)
+        if len(rows) < min(self.page_size(), self.total):
+            self.refresh(recount=False) # the widget grew meanwhile
+
+    def refresh(self, recount=True):
+        ''' Re-read the window in place - after edits, or a resize. '''
+        if not self.pager:
+            return
+        if recount:
+            self.total = self.pager.total()
+        count = self.page_size()
+        if self.rows:
+            rows = self.pager.after(self.pager.key(self.rows[0]), count, inclusive=True)
+        else:
+            rows = self.pager.first(count)
+        self.show(rows)
+
+    def scroll(self, count):
+        ''' Slide the window by count rows. '''
+        if not self.pager or not self.rows or not count:
+            return "break"
+        size = self.page_size()
+        if count > 0:
+            ahead = self.pager.after(self.pager.key(self.rows[-1]), count)
+            if not ahead:
+                return "break"
+            rows = (self.rows + ahead)[-size:]
+            self.offset += len(self.rows) + len(ahead) - len(rows)
+        else:
+            back = self.pager.before(self.pager.key(self.rows[0]), -count)
+            if not back:
+                return "break"
+            rows = (back + self.rows)[:size]
+            self.offset -= len(back)
+        self.show(rows)
+        return "break"
+
+    def yview(self, *args):
+        ''' The scrollbar protocol: moveto fraction | scroll n units/pages. '''
+        if not self.pager:
+            return
+        if args[0] == "moveto":
+            size = self.page_size()
+            target = int(float(args[1]) * self.total)
+            self.offset = max(min(target, self.total - size), 0)
+            self.show(self.pager.at(self.offset, size))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            if args[2] == "pages":
+                count *= self.page_size()
+            self.scroll(count)
+
+    def on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_key(self, step):
+        ''' Arrow keys scroll when the focus is at an edge. '''
+        items = self.tree.get_children()
+        if not items:
+            return "break"
+        focus = self.tree.focus()
+        edge = items[0] if step < 0 else items[-1]
+        if focus and focus != edge:
+            return None # let the Treeview move the focus
+        self.scroll(step)
+        items = self.tree.get_children()
+        if items:
+            edge = items[0] if step < 0 else items[-1]
+            self.tree.focus(edge)
+            self.tree.selection_set(edge)
+        return "break"
+
+    def show(self, rows):
+        ''' Render a window + place the scrollbar. '''
+        size = self.page_size()
+        if len(rows) < size and self.pager and self.offset:
+            # Short at the end: back-fill so the window stays full.
+            if rows:
+                back = self.pager.before(self.pager.key(rows[0]), size - len(rows))
+            else:
+                back = self.pager.last(size)
+            rows = back + rows
+            self.offset = max(self.total - len(rows), 0)
+        self.rows = rows
+        self.render(rows)
+        if self.total:
+            self.scrollbar.set(self.offset / self.total,
+                               min((self.offset + len(rows)) / self.total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
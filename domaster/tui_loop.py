@@ -12,6 +12,9 @@ if '..' not in sys.path:
     
 from domaster.ui_loop import *
 
+# Every color code, deleted by str.translate():
+NO_CODES = str.maketrans('', '', API.CNONE + API.CUSER + API.CALT + API.CERR)
+
 class TuiLoop(MenuDriver):
     ''' Base class for all looping menu 'ops '''
     def __init__(self):
@@ -30,14 +33,17 @@ class TuiLoop(MenuDriver):
         return input(*args)
 
     def print(self, *args, **kwargs):
-        ''' Encapsulation for replacement. '''
-        if len(args):
-            for ss in range(len(args)):
-                for rm in API.CALT, API.CERR, API.CNONE:
-                    val = args[ss].replace(rm, '')
-                print(val)
-        else:
-            print(*args, **kwargs)
+        ''' Encapsulation for replacement. As GuiApp.print(), arguments
+            are separated by sep (default: a new line.) Color codes are
+            removed; the result is one buffered write.
+        '''
+        sep = kwargs.get('sep', '\n')
+        end = kwargs.get('end', '\n')
+        text = sep.join(str(arg) for arg in args).translate(NO_CODES)
+        out = kwargs.get('file') or sys.stdout
+        out.write(text + end if args else end)
+        if kwargs.get('flush'):
+            out.flush()
 
     def loop_status(self, **kwargs):
         ''' Operational state before each loop.
@@ -6,10 +6,14 @@
 # FILE: ui_loop.py
 # AUTHOR: Randall Nagy
 #
-import sys
+import os, sys
+import re
+from functools import lru_cache
 if '..' not in sys.path:
     sys.path.insert(0, '..')
 
+PARSE_CACHE = 4096 # menu lines, prompts & other repeated strings
+
 class API:
     ui_driver = None
     is_gui = False
@@ -17,32 +21,28 @@ class API:
     CUSER = '👉' # Start user input           (aqua)
     CALT  = '👍' # Start ALT color            (white)
     CERR  = '😲' # Start ERROR color          (red)
+    _CODES = re.compile('(' + '|'.join(map(re.escape, (CNONE, CUSER, CALT, CERR))) + ')')
     
     @staticmethod
     def init():
         ''' Set up the TUI '''
         if API.ui_driver: return
-        from tui_loop import TuiLoop
+        from domaster.tui_loop import TuiLoop
         API.ui_driver = TuiLoop()
         is_gui = False
     
+    @lru_cache(maxsize=PARSE_CACHE)
     def parse_coddes_str(a_str:str)->list:
-        seg = ''; line = []; esc = API.CNONE
-        for ch in a_str:
-            found = False
-            for comp in API.CUSER, API.CERR, API.CALT, API.CNONE:
-                if ch == comp:
-                    found = True
-                    if seg:
-                        line.append([esc, seg])
-                        seg = ''
-                    esc = comp
-                    break
-            if not found:
-                seg += ch
-        if seg:
-            line.append([API.CNONE, seg])
-            seg = ''
+        ''' [[code, text], ...] - cached, so treat as read-only. '''
+        # One C-level split: text, code, text, code, ..., text
+        parts = API._CODES.split(a_str)
+        line = []; esc = API.CNONE
+        for ss in range(0, len(parts) - 1, 2):
+            if parts[ss]:
+                line.append([esc, parts[ss]])
+            esc = parts[ss + 1]
+        if parts[-1]: # trailing text is always default
+            line.append([API.CNONE, parts[-1]])
         if not line:
             line.append([API.CNONE, ' '])
         return line
@@ -62,12 +62,21 @@ class API:
                 lines.append(API.parse_coddes_str(str(arg)))
         return lines
 
+    @staticmethod
+    def has_display()->bool:
+        ''' False when a GUI cannot possibly start - skips loading tkinter. '''
+        if sys.platform in ('win32', 'darwin'):
+            return True
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
     @staticmethod
     def set_gui(ops, options, VERSION):
         ''' Try to set up the GUI - False if using TUI '''
-        from domaster.tui_loop import TuiLoop
-        from domaster.gui_loop import GuiLoop
+        if not API.has_display():
+            API.init()
+            return False
         try:
+            from domaster.gui_loop import GuiLoop
             # int('boom')
             API.ui_driver = GuiLoop(ops, options, VERSION)
             API.is_gui = True
@@ -77,6 +86,33 @@ class API:
             API.init()
             return False
         
+    @staticmethod
+    def set_curses()->bool:
+        ''' Try the full-screen TUI - False if using the plain TUI '''
+        if not (sys.stdin.isatty() and sys.stdout.isatty()):
+            API.init()
+            return False
+        try:
+            from domaster.curses_loop import CursesLoop
+            API.ui_driver = CursesLoop()
+            return True
+        except Exception as ex:
+            print(ex)
+            API.init()
+            return False
+
+    @staticmethod
+    def can_page()->bool:
+        ''' True when the driver can browse a TaskPager. '''
+        return hasattr(API.ui_driver, 'page_rows')
+
+    @staticmethod
+    def page_rows(pager, title)->bool:
+        ''' Browse a TaskPager - False when the driver cannot. '''
+        if not API.can_page():
+            return False
+        return API.ui_driver.page_rows(pager, title)
+
     @staticmethod
     def set_color(fore, back)->tuple:
         API.ui_driver.set_color(fore, back)
@@ -244,3 +280,14 @@ if __name__ == '__main__':
             print("TC02b: Testing Error")
             print('\t',the_lines)
             print('\t',tresults)
+
+
+    # TEST: Edge cases - empty, plain, trailing text:
+    print()
+    tresults = API.parse_ccodes(['', 'plain', '😲', '👉a👍b'])
+    if tresults == [[['✌', ' ']], [['✌', 'plain']], [['✌', ' ']], [['👉', 'a'], ['✌', 'b']]]:
+        print('TC03: Testing Success')
+        print('\t',tresults)
+    else:
+        print("TC03: Testing Error")
+        print('\t',tresults)
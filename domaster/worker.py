@@ -0,0 +1,169 @@
+# MISSION: Run database & file work off of the Tk main thread.
+# STATUS: Research
+# VERSION: 1.0.0
+# NOTES: Results come back through a queue that the GUI polls.
+# DATE: 2026-10-18 13:44:18
+# FILE: worker.py
+# AUTHOR: Randall Nagy
+#
+import queue
+import sqlite3
+import threading
+
+POLL_MS = 40 # how often the GUI drains results
+
+class Cancelled(Exception):
+    ''' Raised by Job.check() once a job has been cancelled. '''
+    pass
+
+class Job:
+    ''' One unit of work. fn(job, *args) runs on the worker thread. '''
+    def __init__(self, worker, fn, args, key, on_done, on_error, on_progress):
+        self.worker = worker
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancelled = False
+        self._percent = -1
+
+    def cancel(self):
+        ''' Stop a queued job, or interrupt a running one. '''
+        self.worker.cancel(self)
+
+    def check(self):
+        ''' For long loops: bail out once cancelled. '''
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, done, total):
+        ''' Report progress - at most once per percent. '''
+        percent = int(done * 100 / total) if total else 100
+        if percent != self._percent and self.on_progress:
+            self._percent = percent
+            self.worker.results.put((self.on_progress, (done, total)))
+
+
+class Worker:
+    '''
+A single background thread + a result queue. Callbacks
+(on_done, on_error, on_progress, call_main) always run on
+the thread that calls poll() - the Tk main loop.
+'''
+    def __init__(self, pool=None):
+        self.pool = pool # its connections are the ones to interrupt
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.current = None
+        self.latest = {} # key -> newest job
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, on_progress=None)->Job:
+        ''' Queue fn(job, *args). A new job with the same key
+            cancels (supersedes) the older one.
+        '''
+        job = Job(self, fn, args, key, on_done, on_error, on_progress)
+        if key:
+            with self._lock:
+                older = self.latest.get(key)
+                self.latest[key] = job
+            if older:
+                older.cancel()
+        self.jobs.put(job)
+        return job
+
+    def cancel(self, job):
+        job.cancelled = True
+        with self._lock:
+            if self.current is job and self.pool:
+                self.pool.interrupt(self.thread.ident)
+
+    def is_busy(self)->bool:
+        return self.current is not None or not self.jobs.empty()
+
+    def on_worker(self)->bool:
+        ''' True when called from the worker thread. '''
+        return threading.get_ident() == self.thread.ident
+
+    def call_main(self, fn, *args, **kwargs):
+        ''' Have the polling thread run fn - do not wait for it. '''
+        self.results.put((lambda: fn(*args, **kwargs), ()))
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            if job.cancelled:
+                continue
+            with self._lock:
+                self.current = job
+            try:
+                result = job.fn(job, *job.args)
+                if not job.cancelled and job.on_done:
+                    self.results.put((job.on_done, (result,)))
+            except Cancelled:
+                pass
+            except sqlite3.OperationalError as ex:
+                if not job.cancelled and job.on_error: # else: interrupted
+                    self.results.put((job.on_error, (ex,)))
+            except Exception as ex:
+                if job.on_error:
+                    self.results.put((job.on_error, (ex,)))
+            finally:
+                with self._lock:
+                    self.current = None
+                    if self.latest.get(job.key) is job:
+                        del self.latest[job.key]
+
+    def poll(self)->int:
+        ''' Run every waiting callback. Returns how many ran. '''
+        count = 0
+        while True:
+            try:
+                fn, args = self.results.get_nowait()
+            except queue.Empty:
+                return count
+            fn(*args)
+            count += 1
+
+    def attach(self, widget, every=POLL_MS):
+        ''' Poll from widget's event loop until it is destroyed. '''
+        def tick():
+            try:
+                self.poll()
+            finally:
+                try:
+                    widget.after(every, tick)
+                except Exception:
+                    pass # widget destroyed
+        widget.after(every, tick)
+
+    def stop(self):
+        self.jobs.put(None)
+
+
+if __name__ == '__main__':
+    import sys, time
+    worker = Worker()
+    seen = []
+    worker.submit(lambda job, a, b: a + b, 2, 3, on_done=seen.append)
+    def slow(job):
+        for ss in range(100):
+            job.check()
+            job.progress(ss, 100)
+            time.sleep(0.01)
+        return 'slow'
+    worker.submit(slow, key='k', on_done=seen.append)
+    worker.submit(lambda job: 'fast', key='k', on_done=seen.append)
+    time.sleep(0.2)
+    worker.poll()
+    if seen != [5, 'fast']:
+        print(f"Error 010: worker failure {seen}.")
+        sys.exit(10)
+    worker.stop()
+    print("Testing Success!")